@@ -22,7 +22,7 @@ setup(name='scikit-rf',
 	url='http://www.scikit-rf.org',
 	packages=find_packages(),
 	install_requires = [
-		'numpy',
+		'numpy>=1.22.0',
 		'scipy',
 		'matplotlib',
 		'pandas',
@@ -29,6 +29,27 @@ class VectorFittingTestCase(unittest.TestCase):
         vf.vector_fit(n_poles_real=4, n_poles_cmplx=0, fit_proportional=False, fit_constant=False)
         self.assertLess(vf.get_rms_error(), 0.01)
 
+    def test_ringslot_single_precision(self):
+        # perform the pole relocation in single precision; results should match the double precision fit
+        nw = skrf.data.ring_slot
+        vf = skrf.vectorFitting.VectorFitting(nw)
+        vf.vector_fit(n_poles_real=4, n_poles_cmplx=0, init_pole_spacing='log')
+        rms_double = vf.get_rms_error()
+        vf.work_dtype = np.complex64
+        vf.vector_fit(n_poles_real=4, n_poles_cmplx=0, init_pole_spacing='log')
+        self.assertLess(vf.get_rms_error(), 0.01)
+        self.assertAlmostEqual(vf.get_rms_error(), rms_double, places=6)
+
+    def test_single_precision_converges_in_double(self):
+        # the iterations confirming the convergence of a single precision fit are done in double precision
+        nw = skrf.data.ring_slot
+        vf = skrf.vectorFitting.VectorFitting(nw)
+        vf.work_dtype = np.complex64
+        vf.vector_fit(n_poles_real=4, n_poles_cmplx=0, init_pole_spacing='log')
+        self.assertEqual(len(vf.history_work_dtype), len(vf.delta_max_history))
+        self.assertLess(max(vf.delta_max_history[-2:]), vf.max_tol)
+        self.assertEqual(vf.history_work_dtype[-2:], [np.complex128, np.complex128])
+
     def test_190ghz_measured(self):
         # perform the fit without proportional term
         nw = skrf.network.Network('./doc/source/examples/vectorfitting/190ghz_tx_measured.S2P')
@@ -79,11 +100,61 @@ class VectorFittingTestCase(unittest.TestCase):
         self.assertTrue(np.allclose(vf.proportional_coeff, vf2.proportional_coeff))
         self.assertTrue(np.allclose(vf.constant_coeff, vf2.constant_coeff))
 
+        # compressed export needs to give the same parameters
+        tmp_dir_compressed = tempfile.TemporaryDirectory()
+        vf.write_npz(tmp_dir_compressed.name, compress=True)
+        vf3 = skrf.vectorFitting.VectorFitting(nw)
+        vf3.read_npz(os.path.join(tmp_dir_compressed.name, 'coefficients_{}.npz'.format(nw.name)))
+        self.assertTrue(np.allclose(vf.residues, vf3.residues))
+
+    def test_state_space_model(self):
+        vf = skrf.VectorFitting(None)
+
+        # two-port model with a purely real residue of a complex-conjugate pole
+        vf.poles = np.array([-1, -5 + 6j, -2 + 20j])
+        vf.residues = np.array([[0.3, 4 + 0j, 1 + 1j], [0.1, 2 + 3j, 0.5], [0.1, 2 + 3j, 0.5], [0.4, 3 + 4j, -1j]])
+        vf.constant_coeff = np.array([0.2, 0.1, 0.1, 0.3])
+        vf.proportional_coeff = np.array([0.0, 0.0, 0.0, 0.0])
+
+        # responses of the state-space representation need to match the pole-residue model
+        freqs = np.linspace(0, 10, 51)
+        s_ss = vf._get_s_from_ABCDE(freqs, *vf._get_ABCDE())
+        for i in range(2):
+            for j in range(2):
+                self.assertTrue(np.allclose(s_ss[:, i, j], vf.get_model_response(i, j, freqs)))
+
+        # batched evaluation of a stack of models needs to match the evaluation of the individual models
+        abcde_1 = vf._get_ABCDE()
+        vf.residues = 2 * vf.residues
+        abcde_2 = vf._get_ABCDE()
+        s_batched = vf._get_s_from_ABCDE_batched(freqs, *[np.stack(m) for m in zip(abcde_1, abcde_2)])
+        self.assertTrue(np.allclose(s_batched[0], s_ss))
+        self.assertTrue(np.allclose(s_batched[1], vf._get_s_from_ABCDE(freqs, *abcde_2)))
+
     def test_matplotlib_missing(self):
         vf = skrf.vectorFitting.VectorFitting(skrf.data.ring_slot)
+        mplt = skrf.vectorFitting.mplt
         skrf.vectorFitting.mplt = None
-        with self.assertRaises(RuntimeError):
-            vf.plot_convergence()
+        try:
+            with self.assertRaises(RuntimeError):
+                vf.plot_convergence()
+        finally:
+            skrf.vectorFitting.mplt = mplt
+
+    def test_plot_max_points(self):
+        nw = skrf.data.ring_slot
+        vf = skrf.vectorFitting.VectorFitting(nw)
+        vf.vector_fit(n_poles_real=2, n_poles_cmplx=0)
+
+        # the model response of a dense frequency list gets subsampled, including both ends of the band
+        freqs = np.linspace(nw.f[0], nw.f[-1], 10001)
+        fig, ax = skrf.vectorFitting.mplt.subplots()
+        vf.plot_s_db(0, 0, freqs=freqs, ax=ax, max_points=500)
+        segments = ax.collections[-1].get_segments()
+        skrf.vectorFitting.mplt.close(fig)
+        self.assertEqual(len(segments[0]), 500)
+        self.assertEqual(segments[0][0, 0], freqs[0])
+        self.assertEqual(segments[0][-1, 0], freqs[-1])
 
     def test_passivity_enforcement(self):
         vf = skrf.VectorFitting(None)
@@ -105,6 +176,19 @@ class VectorFittingTestCase(unittest.TestCase):
         # check if model is now passive
         self.assertTrue(vf.is_passive())
 
+    def test_passivity_test_real_pole(self):
+        vf = skrf.VectorFitting(None)
+
+        # one-port model with a single real pole; the half-size test matrix only has real eigenvalues
+        vf.poles = np.array([-1.0])
+        vf.residues = np.array([[1.0 + 0j]])
+        vf.constant_coeff = np.array([0.5])
+        vf.proportional_coeff = np.array([0.0])
+
+        # |S| = |0.5 + 1 / (1 + jw)| > 1 for w < sqrt(5 / 3)
+        violation_bands = vf.passivity_test()
+        self.assertTrue(np.allclose(violation_bands, np.array([[0, np.sqrt(5 / 3) / 2 / np.pi]])))
+
 
 suite = unittest.TestLoader().loadTestsFromTestCase(VectorFittingTestCase)
 unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,13 +1,10 @@
 import numpy as np
 import os
-from numpy import matlib, squeeze
-import pdb
+from scipy import linalg
 
 # imports for type hinting
 from typing import Any, Tuple, TYPE_CHECKING, List
 
-from sympy import to_cnf
-
 if TYPE_CHECKING:
     from .network import Network
 
@@ -18,16 +15,98 @@ try:
         plotting,
     )  # will perform the correct setup for matplotlib before it is called below
     import matplotlib.pyplot as mplt
-    from matplotlib.ticker import EngFormatter
+    from matplotlib.collections import LineCollection
 except ImportError:
     mplt = None
 
 import logging
+import math
 import warnings
 from timeit import default_timer as timer
 import quadprog
 
 
+def _to_db(a: np.ndarray) -> np.ndarray:
+    # converts the magnitudes to dB in the array returned by np.abs() without further temporaries
+    a_db = np.abs(a)
+    np.log10(a_db, out=a_db)
+    a_db *= 20
+    return a_db
+
+
+def _to_deg(a: np.ndarray) -> np.ndarray:
+    # converts the phases to degrees in the array returned by np.angle()
+    phase = np.angle(a)
+    return np.rad2deg(phase, out=phase)
+
+
+def _to_deg_unwrap(a: np.ndarray) -> np.ndarray:
+    # unwraps the phases along the frequency axis (first axis) and converts them to degrees in the same array
+    phase = np.unwrap(np.angle(a), axis=0)
+    return np.rad2deg(phase, out=phase)
+
+
+# transformations of the complex responses into the plot components of `VectorFitting.plot()` and their axis labels
+_COMPONENT_TABLE = {
+    "db": (_to_db, "Magnitude (dB)"),
+    "mag": (np.abs, "Magnitude"),
+    "deg": (_to_deg, "Phase (Degrees)"),
+    "deg_unwrap": (_to_deg_unwrap, "Phase (Degrees)"),
+    "re": (np.real, "Real Part"),
+    "im": (np.imag, "Imaginary Part"),
+}
+
+# SI prefixes understood by SPICE for the engineering notation in the netlists; "m" is milli, hence "meg" for mega
+_SPICE_PREFIXES = {-18: "a", -15: "f", -12: "p", -9: "n", -6: "u", -3: "m", 0: "", 3: "k", 6: "meg", 9: "G", 12: "T"}
+
+
+def _format_eng(num: float, places: int = 3) -> str:
+    """
+    Formats a number in engineering notation with a SPICE unit prefix (1000 --> 1.000k). Numbers beyond the range of
+    the prefixes get an exponent instead (1e-21 --> 1.000e-21).
+    """
+    num = float(num)
+    if num == 0:
+        return "{:.{}f}".format(0.0, places)
+    pow10 = int(math.floor(math.log10(abs(num)) / 3) * 3)
+    mant = num / 10.0 ** pow10
+    # mantissas like 999.9999 get rounded to 1000.000 instead of 1.000k
+    if abs(float("{:.{}f}".format(mant, places))) >= 1000:
+        mant /= 1000
+        pow10 += 3
+    if pow10 in _SPICE_PREFIXES:
+        return "{:.{}f}{}".format(mant, places, _SPICE_PREFIXES[pow10])
+    return "{:.{}f}e{}".format(mant, places, pow10)
+
+
+# static SPICE subcircuits of the equivalent admittances, which are instantiated for each pole-residue pair in
+# `VectorFitting.write_spice_subcircuit_s()`
+#
+# subcircuit for an active RCL+VCCS equivalent admittance Y(s) of a complex-conjugate pole-residue pair H(s)
+# Residue: c = c' + j * c"
+# Pole: p = p' + j * p"
+# H(s)  = c / (s - p) + conj(c) / (s - conj(p))
+#       = (2 * c' * s - 2 * (c'p' + c"p")) / (s ** 2 - 2 * p' * s + |p| ** 2)
+# Y(S)  = (1 / L * s + b) / (s ** 2 + R / L * s + 1 / (L * C))
+#
+# subcircuit for a passive RL equivalent admittance Y(s) of a real pole-residue pair H(s)
+# H(s) = c / (s - p)
+# Y(s) = 1 / L / (s + s * R / L)
+_SPICE_ADMITTANCE_SUBCIRCUITS = """*
+.SUBCKT rcl_vccs_admittance n_pos n_neg res=1k cap=1n ind=100p gm=1m mult=1
+L1 n_pos 1 {ind}
+C1 1 2 {cap}
+R1 2 n_neg {res}
+G1 n_pos n_neg 1 2 {gm} m={mult}
+.ENDS rcl_vccs_admittance
+*
+.SUBCKT rl_admittance n_pos n_neg res=1k ind=100p
+L1 n_pos 1 {ind}
+R1 1 n_neg {res}
+.ENDS rl_admittance
+"""
+
+
 def check_plotting(func):
     """
     This decorator checks if matplotlib.pyplot is available under the name mplt.
@@ -118,6 +197,13 @@ class VectorFitting:
         """ Instance variable specifying the convergence criterion in terms of relative tolerance. To be changed by the
          user before calling :func:`vector_fit`. """
 
+        self.work_dtype = np.complex128
+        """ Instance variable specifying the complex data type of the coefficient matrices during the pole relocation
+        in :func:`vector_fit`. Setting it to `np.complex64` halves the memory traffic of the iterations. The relocation
+        switches back to `np.complex128` once the rounding errors of the reduced precision become significant or the
+        relative changes drop below :attr:`max_tol`. Convergence is only confirmed in double precision, and the final
+        residues are always calculated in double precision. """
+
         self.wall_clock_time = 0
         """ Instance variable holding the wall-clock time (in seconds) consumed by the most recent fitting process with 
         :func:`vector_fit`. Subsequent calls of :func:`vector_fit` will overwrite this value. """
@@ -126,6 +212,7 @@ class VectorFitting:
         self.delta_max_history = []
         self.history_max_sigma = []
         self.history_cond_A = []
+        self.history_work_dtype = []
 
     # legacy getter and setter methods to support deprecated 'zeros' attribute (now correctly called 'residues')
     @property
@@ -153,15 +240,42 @@ class VectorFitting:
 
     @property
     def all_poles(self):
-        all_poles = []
-        if self.poles is not None:
-            for pole in self.poles:
-                if np.imag(pole) == 0:
-                    all_poles.append(pole)
-                else:
-                    all_poles.append(pole)
-                    all_poles.append(np.conj(pole))
-        return np.asarray(all_poles, dtype=complex)
+        if self.poles is None:
+            return np.array([], dtype=complex)
+        poles = np.asarray(self.poles, dtype=complex)
+        # complex poles are followed directly by their complex conjugates
+        n_copies = (poles.imag != 0) + 1
+        all_poles = np.repeat(poles, n_copies)
+        idx_conj = np.cumsum(n_copies)[n_copies == 2] - 1
+        all_poles[idx_conj] = np.conj(all_poles[idx_conj])
+        return all_poles
+
+    @property
+    def _all_residues(self) -> np.ndarray:
+        """
+        Private property.
+        Returns the residues of all responses in the layout of :attr:`all_poles`, i.e. with the residue of each
+        complex-conjugate pole followed directly by its complex conjugate.
+        """
+        is_real, _, _, idx_pole = self._pole_classification
+        residues = np.repeat(np.asarray(self.residues, dtype=complex), np.where(is_real, 1, 2), axis=1)
+        idx_conj = idx_pole[~is_real] + 1
+        residues[:, idx_conj] = np.conjugate(residues[:, idx_conj])
+        return residues
+
+    @property
+    def _pole_classification(self) -> Tuple[np.ndarray, int, int, np.ndarray]:
+        """
+        Private property.
+        Returns the mask of real poles in :attr:`poles`, the numbers of real and complex-conjugate poles, and the
+        position of each pole in the real-valued state-space representation of one port (real poles take one row,
+        complex-conjugate poles take two rows). The position is also the index of each pole in :attr:`all_poles`.
+        """
+        is_real = np.asarray(self.poles).imag == 0.0
+        n_real = int(np.sum(is_real))
+        n_cplx = len(is_real) - n_real
+        offsets = np.concatenate(([0], np.cumsum(np.where(is_real, 1, 2))[:-1])).astype(int)
+        return is_real, n_real, n_cplx, offsets
 
     def vector_fit(
         self,
@@ -250,15 +364,10 @@ class VectorFitting:
         poles = np.zeros(n_poles_real + n_poles_cmplx, dtype=complex)
 
         # add real poles
-        for i, f in enumerate(pole_freqs_real):
-            omega = 2 * np.pi * f
-            poles[i] = -1 * omega
+        poles[:n_poles_real] = -2 * np.pi * pole_freqs_real
 
         # add complex-conjugate poles (store only positive imaginary parts)
-        i_offset = len(pole_freqs_real)
-        for i, f in enumerate(pole_freqs_cmplx):
-            omega = 2 * np.pi * f
-            poles[i_offset + i] = (-0.01 + 1j) * omega
+        poles[n_poles_real:] = (-0.01 + 1j) * (2 * np.pi * pole_freqs_cmplx)
 
         # save initial poles (un-normalize first)
         initial_poles = poles * norm
@@ -288,11 +397,7 @@ class VectorFitting:
         # stack frequency responses as a single vector
         # stacking order (row-major):
         # s11, s12, s13, ..., s21, s22, s23, ...
-        freq_responses = []
-        for i in range(self.network.nports):
-            for j in range(self.network.nports):
-                freq_responses.append(nw_responses[:, i, j])
-        freq_responses = np.array(freq_responses)
+        freq_responses = np.transpose(nw_responses, (1, 2, 0)).reshape((n_responses, n_freqs))
 
         # responses will be weighted according to their norm;
         # alternative: equal weights with weight_response = 1.0
@@ -314,10 +419,23 @@ class VectorFitting:
         self.d_res_history = []
         self.delta_max_history = []
         self.history_cond_A = []
-        converged = False
+        self.history_work_dtype = []
+        # number of iterations performed in reduced working precision; they do not count for the convergence check
+        n_iter_reduced = 0
 
         omega = 2 * np.pi * freqs_norm
         s = 1j * omega
+        # column vector of s for broadcasting against the poles
+        s_col = s[:, None]
+
+        # working precision of the pole relocation (see work_dtype)
+        work_dtype = np.dtype(self.work_dtype)
+        s_col_work = s_col.astype(work_dtype)
+        freq_responses_work = freq_responses.astype(work_dtype)
+
+        # coefficient matrices and right hand side of the pole relocation; their shapes only depend on the numbers of
+        # real and complex poles, which rarely change between iterations, so they are allocated once per combination
+        buffers = {}
 
         while iterations > 0:
             # logging.info("Iteration {}".format(self.max_iterations - iterations + 1))
@@ -342,82 +460,94 @@ class VectorFitting:
                 n_cols_unused += 1
 
             real_mask = poles.imag == 0
-            # list of indices in 'poles' with real values
-            idx_poles_real = np.nonzero(real_mask)[0]
-            # list of indices in 'poles' with complex values
-            idx_poles_complex = np.nonzero(~real_mask)[0]
+            # poles with real values and poles with complex values
+            poles_real = poles[real_mask]
+            poles_cplx = poles[~real_mask]
 
             # positions (columns) of coefficients for real and complex-conjugate terms in the rows of A determine the
             # respective positions of the calculated residues in the results vector.
             # to have them ordered properly for the subsequent assembly of the test matrix H for eigenvalue extraction,
             # place real poles first, then complex-conjugate poles with their respective real and imaginary parts:
             # [r1', r2', ..., (r3', r3''), (r4', r4''), ...]
-            n_real = len(idx_poles_real)
-            n_cmplx = len(idx_poles_complex)
+            n_real = len(poles_real)
+            n_cmplx = len(poles_cplx)
             idx_res_real = np.arange(n_real)
             idx_res_complex_re = n_real + 2 * np.arange(n_cmplx)
             idx_res_complex_im = idx_res_complex_re + 1
 
-            # complex coefficient matrix of shape [N_responses, N_freqs, n_cols_unused + n_cols_used]
-            # layout of each row:
+            # the complex coefficient matrix of each response has the row layout
             # [pole1, pole2, ..., (constant), (proportional), pole1, pole2, ..., constant]
-            A = np.empty((n_responses, n_freqs, n_cols_unused + n_cols_used), dtype=complex)
+            # the left block up to (proportional) is identical for all responses, so it is only built once with shape
+            # [N_freqs, n_cols_unused]; the right block depends on the response and is directly stored as a real
+            # matrix with stacked real and imaginary parts of shape [N_responses, 2 * N_freqs, n_cols_used]
+            if (n_real, n_cmplx, work_dtype) not in buffers:
+                # right hand side vector (weighted)
+                b = np.zeros(n_responses * n_cols_used + 1)
+                b[-1] = weight_extra * n_samples
+
+                buffers[(n_real, n_cmplx, work_dtype)] = (
+                    np.empty((n_freqs, n_cols_unused), dtype=work_dtype),
+                    np.empty((n_responses, n_freqs, n_cols_used - 1), dtype=work_dtype),
+                    np.empty((n_responses, 2 * n_freqs, n_cols_used), dtype=np.finfo(work_dtype).dtype),
+                    np.empty((n_responses * n_cols_used + 1, n_cols_used)),
+                    b,
+                )
+            A_left, A_right, A_right_ri, A_fast, b = buffers[(n_real, n_cmplx, work_dtype)]
 
             # calculate coefficients for real and complex residues in the solution vector
             #
             # real pole-residue term (r = r', p = p'):
             # fractional term is r' / (s - p')
             # coefficient for r' is 1 / (s - p')
-            coeff_real = 1 / (s[:, None] - poles[None, idx_poles_real])
+            coeff_real = 1 / (s_col_work - poles_real.astype(work_dtype))
 
             # complex-conjugate pole-residue pair (r = r' + j r'', p = p' + j p''):
             # fractional term is r / (s - p) + conj(r) / (s - conj(p))
             #                   = [1 / (s - p) + 1 / (s - conj(p))] * r' + [1j / (s - p) - 1j / (s - conj(p))] * r''
             # coefficient for r' is 1 / (s - p) + 1 / (s - conj(p))
             # coefficient for r'' is 1j / (s - p) - 1j / (s - conj(p))
-            coeff_complex_re = 1 / (s[:, None] - poles[None, idx_poles_complex]) + 1 / (
-                s[:, None] - np.conj(poles[None, idx_poles_complex])
-            )
-            coeff_complex_im = 1j / (s[:, None] - poles[None, idx_poles_complex]) - 1j / (
-                s[:, None] - np.conj(poles[None, idx_poles_complex])
-            )
+            # both reciprocals are calculated only once (in-place) and reused for r' and r''
+            inv_s_p = np.reciprocal(s_col_work - poles_cplx.astype(work_dtype))
+            inv_s_pconj = s_col_work - np.conj(poles_cplx).astype(work_dtype)
+            np.reciprocal(inv_s_pconj, out=inv_s_pconj)
+            coeff_complex_re = inv_s_p + inv_s_pconj
+            coeff_complex_im = 1j * (inv_s_p - inv_s_pconj)
 
             # part 1: first sum of rational functions (variable c)
-            A[:, :, idx_res_real] = coeff_real
-            A[:, :, idx_res_complex_re] = coeff_complex_re
-            A[:, :, idx_res_complex_im] = coeff_complex_im
+            A_left[:, idx_res_real] = coeff_real
+            A_left[:, idx_res_complex_re] = coeff_complex_re
+            A_left[:, idx_res_complex_im] = coeff_complex_im
 
             # part 2: constant (variable d) and proportional term (variable e)
-            A[:, :, idx_constant] = 1
-            A[:, :, idx_proportional] = s[:, None]
+            A_left[:, idx_constant] = 1
+            A_left[:, idx_proportional] = s_col_work
 
             # part 3: second sum of rational functions multiplied with frequency response (variable c_res)
-            A[:, :, n_cols_unused + idx_res_real] = -1 * freq_responses[:, :, None] * coeff_real
-            A[:, :, n_cols_unused + idx_res_complex_re] = -1 * freq_responses[:, :, None] * coeff_complex_re
-            A[:, :, n_cols_unused + idx_res_complex_im] = -1 * freq_responses[:, :, None] * coeff_complex_im
+            # the rational coefficients are the first n_cols_used - 1 columns of A_left; the product is written into
+            # the complex buffer and its negated real and imaginary parts directly into the real-valued block
+            np.multiply(freq_responses_work[:, :, None], A_left[None, :, :n_cols_used - 1], out=A_right)
+            np.negative(A_right.real, out=A_right_ri[:, :n_freqs, :-1])
+            np.negative(A_right.imag, out=A_right_ri[:, n_freqs:, :-1])
 
             # part 4: constant (variable d_res)
-            A[:, :, -1] = -1 * freq_responses
+            np.negative(freq_responses_work.real, out=A_right_ri[:, :n_freqs, -1])
+            np.negative(freq_responses_work.imag, out=A_right_ri[:, n_freqs:, -1])
 
-            # QR decomposition
-            # R = np.linalg.qr(np.hstack((A.real, A.imag)), 'r')
+            # QR decomposition of the real-valued system (real and imaginary parts stacked along the rows)
+            # only R22 of the full decomposition [[R11, R12], [0, R22]] is required to solve for c_res and d_res.
+            # with A_left = Q1 * R11, R22 is the R factor of the part of A_right that is orthogonal to Q1, so the shared
+            # left block only needs to be decomposed once instead of once per response
+            A_left_ri = np.concatenate((A_left.real, A_left.imag), axis=0)
+            Q1 = np.linalg.qr(A_left_ri, mode="reduced")[0]
+            A_right_ri -= np.matmul(Q1, np.matmul(Q1.T, A_right_ri))
 
-            # direct QR of stacked matrices for linalg.qr() only works with numpy>=1.22.0
-            # workaround for old numpy:
-            R = np.empty((n_responses, n_cols_unused + n_cols_used, n_cols_unused + n_cols_used))
-            A_ri = np.hstack((A.real, A.imag))
-            for i in range(n_responses):
-                R[i] = np.linalg.qr(A_ri[i], mode="r")
-
-            # only R22 is required to solve for c_res and d_res
-            R22 = R[:, n_cols_unused:, n_cols_unused:]
-
-            # weighting
-            R22 = weights_responses[:, None, None] * R22
+            # direct QR of stacked matrices for all responses at once; requires numpy>=1.22.0
+            R22 = np.linalg.qr(A_right_ri, mode="r")
 
             # assemble compressed coefficient matrix A_fast by row-stacking individual upper triangular matrices R22
-            A_fast = np.empty((n_responses * n_cols_used + 1, n_cols_used))
-            A_fast[:-1, :] = R22.reshape((n_responses * n_cols_used, n_cols_used))
+            # (weighted)
+            np.multiply(weights_responses[:, None, None], R22,
+                        out=A_fast[:-1, :].reshape((n_responses, n_cols_used, n_cols_used)))
 
             # extra equation to avoid trivial solution
             A_fast[-1, idx_res_real] = np.sum(coeff_real.real, axis=0)
@@ -426,19 +556,17 @@ class VectorFitting:
             A_fast[-1, -1] = n_freqs
 
             # weighting
-            A_fast[-1, :] = weight_extra * A_fast[-1, :]
+            A_fast[-1, :] *= weight_extra
 
-            # right hand side vector (weighted)
-            b = np.zeros(n_responses * n_cols_used + 1)
-            b[-1] = weight_extra * n_samples
+            # solve least squares for real parts
+            x, residuals, rank, singular_vals = np.linalg.lstsq(A_fast, b, rcond=None)
 
-            cond_A = np.linalg.cond(A_fast)
+            # the condition number is the ratio of the largest and smallest singular values, which lstsq already
+            # returned in descending order
+            cond_A = singular_vals[0] / singular_vals[-1]
             # logging.info("Condition number of coeff. matrix A = {}".format(int(cond_A)))
             self.history_cond_A.append(cond_A)
 
-            # solve least squares for real parts
-            x, residuals, rank, singular_vals = np.linalg.lstsq(A_fast, b, rcond=None)
-
             # assemble individual result vectors from single LS result x
             c_res = x[:-1]
             d_res = x[-1]
@@ -459,25 +587,15 @@ class VectorFitting:
             # logging.info("d_res = {}".format(d_res))
 
             # build test matrix H, which will hold the new poles as eigenvalues
-            H = np.zeros((len(c_res), len(c_res)))
-
-            poles_real = poles[np.nonzero(real_mask)]
-            poles_cplx = poles[np.nonzero(~real_mask)]
+            H = self._build_companion_H(poles_real, poles_cplx, c_res, d_res)
 
-            H[idx_res_real, idx_res_real] = poles_real.real
-            H[idx_res_real] -= c_res / d_res
-
-            H[idx_res_complex_re, idx_res_complex_re] = poles_cplx.real
-            H[idx_res_complex_re, idx_res_complex_im] = poles_cplx.imag
-            H[idx_res_complex_im, idx_res_complex_re] = -1 * poles_cplx.imag
-            H[idx_res_complex_im, idx_res_complex_im] = poles_cplx.real
-            H[idx_res_complex_re] -= 2 * c_res / d_res
-
-            poles_new = np.linalg.eigvals(H)
+            # H is freshly allocated in every iteration, so LAPACK may overwrite it. H.T has the same eigenvalues and is
+            # Fortran-contiguous, which lets scipy skip the copy that np.linalg.eigvals would make
+            poles_new = linalg.eigvals(H.T, overwrite_a=True, check_finite=False)
 
             # replace poles for next iteration
             # complex poles need to come in complex conjugate pairs; append only the positive part
-            poles = poles_new[np.nonzero(poles_new.imag >= 0)]
+            poles = poles_new[poles_new.imag >= 0]
 
             # flip real part of unstable poles (real part needs to be negative for stability)
             poles.real = -1 * np.abs(poles.real)
@@ -486,26 +604,31 @@ class VectorFitting:
             new_max_singular = np.amax(singular_vals)
             delta_max = np.abs(1 - new_max_singular / max_singular)
             self.delta_max_history.append(delta_max)
+            self.history_work_dtype.append(work_dtype)
             # logging.info("Max. relative change in residues = {}\n".format(delta_max))
             max_singular = new_max_singular
 
-            stop = False
-            if delta_max < self.max_tol:
-                if converged:
-                    # is really converged, finish
-                    logging.info(
-                        "Pole relocation process converged after {} iterations.".format(
-                            self.max_iterations - iterations + 1
-                        )
+            # once the relative changes are in the range of the rounding errors of a reduced working precision or
+            # below the tolerance, continue in double precision and restart the convergence check; convergence is
+            # only ever confirmed by iterations in double precision
+            if work_dtype != np.complex128 and delta_max < max(cond_A * np.finfo(work_dtype).eps, self.max_tol):
+                logging.info("Switching pole relocation to double precision.")
+                work_dtype = np.dtype(np.complex128)
+                s_col_work = s_col
+                freq_responses_work = freq_responses
+                n_iter_reduced = len(self.delta_max_history)
+
+            # the poles might be converged once the relative change drops below the tolerance; they are really
+            # converged if this holds for the last two iterations
+            deltas = self.delta_max_history[n_iter_reduced:]
+            converged = len(deltas) >= 1 and deltas[-1] < self.max_tol
+            stop = len(deltas) >= 2 and max(deltas[-2:]) < self.max_tol
+            if stop:
+                logging.info(
+                    "Pole relocation process converged after {} iterations.".format(
+                        self.max_iterations - iterations + 1
                     )
-                    stop = True
-                else:
-                    # might be converged, but do one last run to be sure
-                    converged = True
-            else:
-                if converged:
-                    # is not really converged, continue
-                    converged = False
+                )
 
             iterations -= 1
 
@@ -563,10 +686,10 @@ class VectorFitting:
             idx_proportional = [n_cols]
             n_cols += 1
 
-        # list of indices in 'poles' with real and with complex values
+        # poles with real and with complex values
         real_mask = poles.imag == 0
-        idx_poles_real = np.nonzero(real_mask)[0]
-        idx_poles_complex = np.nonzero(~real_mask)[0]
+        poles_real = poles[real_mask]
+        poles_cplx = poles[~real_mask]
 
         # find and save indices of real and complex poles in the poles list
         i = 0
@@ -592,19 +715,19 @@ class VectorFitting:
         # real pole-residue term (r = r', p = p'):
         # fractional term is r' / (s - p')
         # coefficient for r' is 1 / (s - p')
-        coeff_real = 1 / (s[:, None] - poles[None, idx_poles_real])
+        coeff_real = 1 / (s_col - poles_real)
 
         # complex-conjugate pole-residue pair (r = r' + j r'', p = p' + j p''):
         # fractional term is r / (s - p) + conj(r) / (s - conj(p))
         #                   = [1 / (s - p) + 1 / (s - conj(p))] * r' + [1j / (s - p) - 1j / (s - conj(p))] * r''
         # coefficient for r' is 1 / (s - p) + 1 / (s - conj(p))
         # coefficient for r'' is 1j / (s - p) - 1j / (s - conj(p))
-        coeff_complex_re = 1 / (s[:, None] - poles[None, idx_poles_complex]) + 1 / (
-            s[:, None] - np.conj(poles[None, idx_poles_complex])
-        )
-        coeff_complex_im = 1j / (s[:, None] - poles[None, idx_poles_complex]) - 1j / (
-            s[:, None] - np.conj(poles[None, idx_poles_complex])
-        )
+        # both reciprocals are calculated only once (in-place) and reused for r' and r''
+        inv_s_p = np.reciprocal(s_col - poles_cplx)
+        inv_s_pconj = s_col - np.conj(poles_cplx)
+        np.reciprocal(inv_s_pconj, out=inv_s_pconj)
+        coeff_complex_re = inv_s_p + inv_s_pconj
+        coeff_complex_im = 1j * (inv_s_p - inv_s_pconj)
 
         # part 1: first sum of rational functions (variable c)
         A[:, idx_res_real] = coeff_real
@@ -613,21 +736,24 @@ class VectorFitting:
 
         # part 2: constant (variable d) and proportional term (variable e)
         A[:, idx_constant] = 1
-        A[:, idx_proportional] = s[:, None]
+        A[:, idx_proportional] = s_col
 
         # logging.info(
         #    "Condition number of coefficient matrix = {}".format(int(np.linalg.cond(A)))
         # )
 
         # solve least squares and obtain results as stack of real part vector and imaginary part vector
-        x, residuals, rank, singular_vals = np.linalg.lstsq(
-            np.vstack((A.real, A.imag)),
-            np.hstack((freq_responses.real, freq_responses.imag)).transpose(),
-            rcond=None,
-        )
+        # A_ri is small in the number of columns, so the normal equations are solved with a Cholesky factorization;
+        # the SVD-based least-squares solver is only used as a fallback for (numerically) rank-deficient systems
+        A_ri = np.vstack((A.real, A.imag))
+        b_ri = np.hstack((freq_responses.real, freq_responses.imag)).transpose()
+        try:
+            x = linalg.cho_solve(linalg.cho_factor(np.dot(A_ri.T, A_ri)), np.dot(A_ri.T, b_ri))
+        except linalg.LinAlgError:
+            x, residuals, rank, singular_vals = np.linalg.lstsq(A_ri, b_ri, rcond=None)
 
         # align poles and residues arrays to get matching pole-residue pairs
-        poles = np.concatenate((poles[idx_poles_real], poles[idx_poles_complex]))
+        poles = np.concatenate((poles_real, poles_cplx))
         residues = np.concatenate(
             (x[idx_res_real], x[idx_res_complex_re] + 1j * x[idx_res_complex_im]),
             axis=0,
@@ -664,6 +790,52 @@ class VectorFitting:
                     stacklevel=2,
                 )
 
+    @staticmethod
+    def _build_companion_H(poles_real: np.ndarray, poles_cplx: np.ndarray, c_res: np.ndarray, d_res: float
+                           ) -> np.ndarray:
+        """
+        Private method.
+        Returns the real-valued test matrix H of the pole relocation step, whose eigenvalues are the relocated poles.
+
+        Parameters
+        ----------
+        poles_real : ndarray
+            Real poles of the current iteration.
+        poles_cplx : ndarray
+            Complex poles of the current iteration (only the ones with positive imaginary part).
+        c_res : ndarray
+            Residues of the sigma function in the layout [r1', r2', ..., (r3', r3''), (r4', r4''), ...].
+        d_res : float
+            Constant term of the sigma function.
+
+        Returns
+        -------
+        ndarray
+            Test matrix H with shape (len(c_res), len(c_res)).
+        """
+
+        n_real = len(poles_real)
+        n = len(c_res)
+        H = np.zeros((n, n))
+
+        # the block-diagonal part is written through strided views of the main, upper and lower diagonals;
+        # each complex-conjugate pole contributes a 2x2 block [[p', p''], [-p'', p']]
+        H_flat = H.reshape(-1)
+        diag = H_flat[::n + 1]
+        diag[:n_real] = poles_real.real
+        diag[n_real::2] = poles_cplx.real
+        diag[n_real + 1::2] = poles_cplx.real
+        H_flat[1::n + 1][n_real::2] = poles_cplx.imag
+        H_flat[n::n + 1][n_real::2] = -1 * poles_cplx.imag
+
+        # subtract c_res / d_res from the rows of the real poles and 2 * c_res / d_res from the rows holding the real
+        # parts of the complex poles
+        c_res_norm = c_res / d_res
+        H[:n_real] -= c_res_norm
+        H[n_real::2] -= 2 * c_res_norm
+
+        return H
+
     def get_rms_error(self, i=-1, j=-1, parameter_type: str = "s"):
         r"""
         Returns the root-mean-square (rms) error magnitude of the fit, i.e.
@@ -697,15 +869,19 @@ class VectorFitting:
             If the specified parameter representation type is not :attr:`s`, :attr:`z`, nor :attr:`y`.
         """
 
+        # the network properties are read only once
+        n_ports = self.network.nports
+        freqs = self.network.f
+
         if i == -1:
-            list_i = range(self.network.nports)
+            list_i = range(n_ports)
         elif isinstance(i, int):
             list_i = [i]
         else:
             list_i = i
 
         if j == -1:
-            list_j = range(self.network.nports)
+            list_j = range(n_ports)
         elif isinstance(j, int):
             list_j = [j]
         else:
@@ -720,12 +896,14 @@ class VectorFitting:
         else:
             raise ValueError("Invalid parameter type `{}`. Valid options: `s`, `z`, or `y`".format(parameter_type))
 
-        error_mean_squared = 0
-        for i in list_i:
-            for j in list_j:
-                nw_ij = nw_responses[:, i, j]
-                fit_ij = self.get_model_response(i, j, self.network.f)
-                error_mean_squared += np.mean(np.square(np.abs(nw_ij - fit_ij)))
+        # evaluate all selected responses at once; the mean squared errors of the individual responses are summed up
+        list_i, list_j = np.meshgrid(list_i, list_j, indexing="ij")
+        list_i = list_i.ravel()
+        list_j = list_j.ravel()
+        fit = self._get_model_responses(list_i * n_ports + list_j, freqs)
+        error = np.transpose(nw_responses[:, list_i, list_j]) - fit
+        # squared magnitudes without the square root of np.abs()
+        error_mean_squared = np.sum(np.mean(error.real ** 2 + error.imag ** 2, axis=1))
 
         return np.sqrt(error_mean_squared)
 
@@ -778,13 +956,7 @@ class VectorFitting:
 
         # determine size of the matrix system
         n_ports = int(np.sqrt(len(self.constant_coeff)))
-        n_poles_real = 0
-        n_poles_cplx = 0
-        for pole in self.poles:
-            if np.imag(pole) == 0.0:
-                n_poles_real += 1
-            else:
-                n_poles_cplx += 1
+        is_real, n_poles_real, n_poles_cplx, idx_pole = self._pole_classification
         n_matrix = (n_poles_real + 2 * n_poles_cplx) * n_ports
 
         # state-space matrix A holds the poles on the diagonal as real values with imaginary parts on the sub-diagonal
@@ -792,89 +964,109 @@ class VectorFitting:
         # assemble A = [[poles_real,   0,                  0],
         #               [0,            real(poles_cplx),   imag(poles_cplx],
         #               [0,            -imag(poles_cplx),  real(poles_cplx]]
+        poles = np.asarray(self.poles)
+        residues = np.asarray(self.residues)
+
         if for_passivity_enforcing:
+            # complex-valued diagonal representation: complex-conjugate poles and residues are placed separately on
+            # the diagonal of A and in C, respectively
+            residues_all = self._all_residues[0]
+
             B = np.ones(shape=(n_matrix, n_ports))
             A = np.identity(n_matrix, dtype=complex)
             C = np.zeros(shape=(n_ports, n_matrix), dtype=complex)
             D = np.zeros(shape=(n_ports, n_ports))
             E = np.zeros(shape=(n_ports, n_ports))
-            i_A = 0
-            i_C = 0
-            for _i, pole in enumerate(self.poles):
-                if np.imag(pole) == 0.0:
-                    A[i_A, i_A] = pole
-                    C[0, i_C] = self.residues[0, _i]
-                    i_A += 1
-                    i_C += 1
-                else:
-                    A[i_A, i_A] = np.real(pole) + 1j * np.imag(pole)
-                    A[i_A + 1, i_A + 1] = np.real(pole) - 1j * np.imag(pole)
-                    C[0, i_C] = np.real(self.residues[0, _i]) + 1j * np.imag(self.residues[0, _i])
-                    C[0, i_C + 1] = np.real(self.residues[0, _i]) - 1j * np.imag(self.residues[0, _i])
-                    i_A += 2
-                    i_C += 2
+            idx_diag = np.arange(len(residues_all))
+            A[idx_diag, idx_diag] = self.all_poles
+            C[0, idx_diag] = residues_all
             D[0, 0] = self.constant_coeff[0]
             return A, B, C, D, E
+
+        # position of each pole in the block of one port (real poles take one row, complex poles take two rows)
+        n_block = n_poles_real + 2 * n_poles_cplx
+        idx_cplx = idx_pole[~is_real]
+
+        # rows of all poles and of all complex poles in A, for all ports
+        rows = (n_block * np.arange(n_ports)[:, None] + idx_pole).ravel()
+        rows_cplx = (n_block * np.arange(n_ports)[:, None] + idx_cplx).ravel()
+        poles_cplx = np.tile(poles[~is_real], n_ports)
+
         A = np.identity(n_matrix)
+        A[rows, rows] = np.tile(poles.real, n_ports)
+        A[rows_cplx, rows_cplx + 1] = poles_cplx.imag
+        A[rows_cplx + 1, rows_cplx] = -1 * poles_cplx.imag
+        A[rows_cplx + 1, rows_cplx + 1] = poles_cplx.real
+
         B = np.zeros(shape=(n_matrix, n_ports))
-        i_A = 0  # index on diagonal of A
-        for j in range(n_ports):
-            for pole in self.poles:
-                if np.imag(pole) == 0.0:
-                    # adding a real pole
-                    A[i_A, i_A] = np.real(pole)
-                    B[i_A, j] = 1
-                    i_A += 1
-                else:
-                    # adding a complex-conjugate pole
-                    A[i_A, i_A] = np.real(pole)
-                    A[i_A, i_A + 1] = np.imag(pole)
-                    A[i_A + 1, i_A] = -1 * np.imag(pole)
-                    A[i_A + 1, i_A + 1] = np.real(pole)
-                    B[i_A, j] = 2
-                    i_A += 2
+        B[rows, np.repeat(np.arange(n_ports), len(poles))] = np.tile(np.where(is_real, 1, 2), n_ports)
 
         # state-space matrix C holds the residues
         # assemble C = [[R1.11, R1.12, R1.13, ...], [R2.11, R2.12, R2.13, ...], ...]
-        C = np.zeros(shape=(n_ports, n_matrix))
-        for i in range(n_ports):
-            for j in range(n_ports):
-                # i: row index
-                # j: column index
-                i_response = i * n_ports + j
-
-                j_residues = 0
-                for zero in self.residues[i_response]:
-                    if np.imag(zero) == 0.0:
-                        C[i, j * (n_poles_real + 2 * n_poles_cplx) + j_residues] = np.real(zero)
-                        j_residues += 1
-                    else:
-                        C[i, j * (n_poles_real + 2 * n_poles_cplx) + j_residues] = np.real(zero)
-                        C[i, j * (n_poles_real + 2 * n_poles_cplx) + j_residues + 1] = np.imag(zero)
-                        j_residues += 2
+        # residues of response (i, j) go into row i and into the block of column j; complex residues take two columns
+        # (real and imaginary part)
+        C = np.zeros(shape=(n_ports, n_ports, n_block))
+        residues = residues.reshape((n_ports, n_ports, len(poles)))
+        C[:, :, idx_pole] = residues.real
+        C[:, :, idx_cplx + 1] = residues[:, :, ~is_real].imag
+        C = C.reshape((n_ports, n_matrix))
 
         # state-space matrix D holds the constants
         # assemble D = [[d11, d12, ...], [d21, d22, ...], ...]
-        D = np.zeros(shape=(n_ports, n_ports))
-        for i in range(n_ports):
-            for j in range(n_ports):
-                # i: row index
-                # j: column index
-                i_response = i * n_ports + j
-                D[i, j] = self.constant_coeff[i_response]
+        D = np.array(self.constant_coeff, dtype=float).reshape((n_ports, n_ports))
 
         # state-space matrix E holds the proportional coefficients (usually 0 in case of fitted S-parameters)
         # assemble E = [[e11, e12, ...], [e21, e22, ...], ...]
-        E = np.zeros(shape=(n_ports, n_ports))
-        for i in range(n_ports):
-            for j in range(n_ports):
-                # i: row index
-                # j: column index
-                i_response = i * n_ports + j
-                E[i, j] = self.proportional_coeff[i_response]
+        E = np.array(self.proportional_coeff, dtype=float).reshape((n_ports, n_ports))
 
         return A, B, C, D, E
 
+    @staticmethod
+    def _get_block_inverse(s: np.ndarray, A: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Private method.
+        Calculates (sI - A)^-1 analytically for block-diagonal system matrices A with 1x1 blocks (real poles) and 2x2
+        blocks (complex-conjugate poles), as provided by `_get_ABCDE()`.
+
+        Parameters
+        ----------
+        s : ndarray
+            Complex frequencies (fx1).
+        A : ndarray
+            System matrix (KxK).
+
+        Returns
+        -------
+        tuple or None
+            Diagonal (fxK), upper and lower off-diagonal entries (fxL) of (sI - A)^-1 and the indices (L) of the first
+            and second rows of the L 2x2 blocks, or None if A is not block-diagonal in this form.
+        """
+
+        a_diag = np.diagonal(A)
+        a_upper = np.diagonal(A, 1)
+        a_lower = np.diagonal(A, -1)
+        is_block = (a_upper != 0) | (a_lower != 0)
+        if np.count_nonzero(A) != np.count_nonzero(a_diag) + np.count_nonzero(a_upper) + np.count_nonzero(a_lower) \
+                or np.any(is_block[1:] & is_block[:-1]):
+            return None
+
+        # first and second index of each 2x2 block
+        k0 = np.flatnonzero(is_block)
+        k1 = k0 + 1
+
+        # 1x1 blocks: 1 / (s - a)
+        # 2x2 blocks: [[s - a11, a01], [a10, s - a00]] / ((s - a00) * (s - a11) - a01 * a10)
+        inv_diag = s - a_diag
+        det = inv_diag[:, k0] * inv_diag[:, k1] - a_upper[k0] * a_lower[k0]
+        inv_diag[:, k0], inv_diag[:, k1] = inv_diag[:, k1] / det, inv_diag[:, k0] / det
+        is_single = np.ones(len(a_diag), dtype=bool)
+        is_single[k0] = False
+        is_single[k1] = False
+        inv_diag[:, is_single] = 1 / inv_diag[:, is_single]
+        inv_upper = a_upper[k0] / det
+        inv_lower = a_lower[k0] / det
+        return inv_diag, inv_upper, inv_lower, k0, k1
+
     @staticmethod
     def _get_s_from_ABCDE(
         freqs: np.ndarray,
@@ -883,6 +1075,7 @@ class VectorFitting:
         C: np.ndarray,
         D: np.ndarray,
         E: np.ndarray,
+        out: np.ndarray = None,
     ) -> np.ndarray:
         """
         Private method.
@@ -899,6 +1092,8 @@ class VectorFitting:
         C : ndarray
         D : ndarray
         E : ndarray
+        out : ndarray, optional
+            Complex-valued array (fxNxN) to write the result into, e.g. to reuse it in iterative routines.
 
         Returns
         -------
@@ -907,11 +1102,109 @@ class VectorFitting:
         """
 
         dim_A = np.shape(A)[0]
-        stsp_poles = np.linalg.inv(2j * np.pi * freqs[:, None, None] * np.identity(dim_A)[None, :, :] - A[None, :, :])
-        stsp_S = np.matmul(np.matmul(C, stsp_poles), B)
-        stsp_S += D + 2j * np.pi * freqs[:, None, None] * E
+        s = 2j * np.pi * np.asarray(freqs)[:, None]
+
+        # A as provided by _get_ABCDE() is block-diagonal, so (sI - A)^-1 can be calculated analytically instead of
+        # solving a full system at each frequency
+        inv_blocks = VectorFitting._get_block_inverse(s, A)
+        if inv_blocks is not None:
+            inv_diag, inv_upper, inv_lower, k0, k1 = inv_blocks
+            stsp_S = np.matmul(C[None, :, :] * inv_diag[:, None, :], B, out=out)
+            stsp_S += np.matmul(C[None, :, k0] * inv_upper[:, None, :], B[k1])
+            stsp_S += np.matmul(C[None, :, k1] * inv_lower[:, None, :], B[k0])
+        else:
+            # general A: solve (sI - A) X = B instead of forming the inverse; sI - A is built by adding s to the
+            # diagonal of -A, rather than by multiplying s with a stack of identity matrices
+            sI_A = np.negative(np.broadcast_to(A, (len(s), dim_A, dim_A)), dtype=complex)
+            idx = np.arange(dim_A)
+            sI_A[:, idx, idx] += s
+            stsp_poles_B = np.linalg.solve(sI_A, B[None, :, :])
+            stsp_S = np.matmul(C, stsp_poles_B, out=out)
+        stsp_S += D
+        if np.any(E):
+            stsp_S += s[:, :, None] * E
+        return stsp_S
+
+    @staticmethod
+    def _get_s_from_ABCDE_batched(
+        freqs: np.ndarray,
+        A: np.ndarray,
+        B: np.ndarray,
+        C: np.ndarray,
+        D: np.ndarray,
+        E: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Private method.
+        Batched version of `_get_s_from_ABCDE()` for a stack of M state-space models of equal size, e.g. when sweeping
+        candidate models. All frequencies and models are evaluated in one broadcasted solve.
+
+        Parameters
+        ----------
+        freqs : ndarray
+            Frequencies (in Hz) at which to calculate the S-matrices.
+        A : ndarray
+            Stack of system matrices (MxKxK).
+        B : ndarray
+            Stack of input matrices (MxKxN).
+        C : ndarray
+            Stack of output matrices (MxNxK).
+        D : ndarray
+            Stack of feedthrough matrices (MxNxN).
+        E : ndarray
+            Stack of proportional matrices (MxNxN).
+
+        Returns
+        -------
+        ndarray
+            Complex-valued S-matrices (MxfxNxN) of all models calculated at frequencies `freqs`.
+        """
+
+        n_models, dim_A = np.shape(A)[:2]
+        s = 2j * np.pi * np.asarray(freqs)
+
+        # sI - A for all models and frequencies (MxfxKxK)
+        sI_A = np.negative(np.broadcast_to(A[:, None, :, :], (n_models, len(s), dim_A, dim_A)), dtype=complex)
+        idx = np.arange(dim_A)
+        sI_A[:, :, idx, idx] += s[None, :, None]
+
+        stsp_S = np.matmul(C[:, None, :, :], np.linalg.solve(sI_A, B[:, None, :, :]))
+        stsp_S += D[:, None, :, :]
+        if np.any(E):
+            stsp_S += s[None, :, None, None] * E[:, None, :, :]
         return stsp_S
 
+    @staticmethod
+    def _get_svd(s: np.ndarray, compute_uv: bool = True) -> Any:
+        """
+        Private method.
+        Calculates the (reduced) singular value decompositions of a stack of matrices with the fast divide-and-conquer
+        driver `gesdd` of `np.linalg.svd()`. If it fails to converge, which can happen for nearly singular matrices,
+        the decompositions are repeated one by one with the slower but more robust driver `gesvd`.
+
+        Parameters
+        ----------
+        s : ndarray
+            Stack of matrices (fxNxN).
+        compute_uv : bool, optional
+            Also return the singular vectors.
+
+        Returns
+        -------
+        ndarray or tuple
+            Singular values (fxN) or, if `compute_uv` is True, the tuple (u, sigma, vh) as in `np.linalg.svd()`.
+        """
+
+        try:
+            return np.linalg.svd(s, full_matrices=False, compute_uv=compute_uv)
+        except np.linalg.LinAlgError:
+            logging.info("SVD with gesdd did not converge; retrying with gesvd")
+            svds = [linalg.svd(s_k, full_matrices=False, compute_uv=compute_uv, lapack_driver="gesvd")
+                    for s_k in s]
+            if compute_uv:
+                return tuple(np.stack(svd_k) for svd_k in zip(*svds))
+            return np.stack(svds)
+
     def passivity_test(self, parameter_type: str = "s") -> np.ndarray:
         """
         Evaluates the passivity of reciprocal vector fitted models by means of a half-size test matrix [#]_. Any
@@ -987,60 +1280,40 @@ class VectorFitting:
         n_ports = np.shape(D)[0]
 
         # build half-size test matrix P from state-space matrices A, B, C, D
-        inv_neg = np.linalg.inv(D - np.identity(n_ports))
-        inv_pos = np.linalg.inv(D + np.identity(n_ports))
-        prod_neg = np.matmul(np.matmul(B, inv_neg), C)
-        prod_pos = np.matmul(np.matmul(B, inv_pos), C)
+        # B * (D -+ I)^-1 * C is calculated by solving for (D -+ I)^-1 * C instead of inverting D -+ I
+        prod_neg = np.matmul(B, np.linalg.solve(D - np.identity(n_ports), C))
+        prod_pos = np.matmul(B, np.linalg.solve(D + np.identity(n_ports), C))
         P = np.matmul(A - prod_neg, A - prod_pos)
 
         # extract eigenvalues of P
         P_eigs = np.linalg.eigvals(P)
 
-        # purely imaginary square roots of eigenvalues identify frequencies (2*pi*f) of borders of passivity violations
-        freqs_violation = []
-        for sqrt_eigenval in np.sqrt(P_eigs):
-            if np.real(sqrt_eigenval) == 0.0:
-                freqs_violation.append(np.imag(sqrt_eigenval) / 2 / np.pi)
-
-        # include dc (0) unless it's already included
-        if len(np.nonzero(np.array(freqs_violation) == 0.0)[0]) == 0:
-            freqs_violation.append(0.0)
+        # purely imaginary square roots of eigenvalues identify frequencies (2*pi*f) of borders of passivity violations;
+        # eigvals() returns a real array if all eigenvalues are real, so np.emath.sqrt() is required to get imaginary
+        # roots of the negative ones
+        sqrt_eigenvals = np.emath.sqrt(P_eigs)
+        freqs_violation = sqrt_eigenvals[sqrt_eigenvals.real == 0.0].imag / 2 / np.pi
 
-        # sort the output from lower to higher frequencies
-        freqs_violation = np.sort(freqs_violation)
+        # include dc (0) and sort the output from lower to higher frequencies
+        freqs_violation = np.unique(np.append(freqs_violation, 0.0))
 
         # identify frequency bands of passivity violations
 
         # sweep the bands between crossover frequencies and identify bands of passivity violations
-        violation_bands = []
-        for i, freq in enumerate(freqs_violation):
-            if i == len(freqs_violation) - 1:
-                # last band stops always at infinity
-                f_start = freq
-                f_stop = np.inf
-                f_center = 1.1 * f_start  # 1.1 is chosen arbitrarily to have any frequency for evaluation
-            else:
-                # intermediate band between this frequency and the previous one
-                f_start = freq
-                f_stop = freqs_violation[i + 1]
-                f_center = 0.5 * (f_start + f_stop)
-
-            # calculate singular values at the center frequency between crossover frequencies to identify violations
-            s_center = self._get_s_from_ABCDE(np.array([f_center]), A, B, C, D, E)
-            sigma = np.linalg.svd(s_center[0], compute_uv=False)
-            passive = True
-            for singval in sigma:
-                if singval > 1:
-                    # passivity violation in this band
-                    passive = False
-            if not passive:
-                # add this band to the list of passivity violations
-                if violation_bands is None:
-                    violation_bands = [[f_start, f_stop]]
-                else:
-                    violation_bands.append([f_start, f_stop])
+        # intermediate bands are between this frequency and the next one; the last band stops always at infinity
+        f_start = freqs_violation
+        f_stop = np.append(freqs_violation[1:], np.inf)
+        # 1.1 is chosen arbitrarily for the last band to have any frequency for evaluation
+        f_center = np.append(0.5 * (f_start[:-1] + f_stop[:-1]), 1.1 * f_start[-1])
+
+        # calculate singular values at the center frequencies between crossover frequencies to identify violations
+        s_center = self._get_s_from_ABCDE(f_center, A, B, C, D, E)
+        sigma = np.linalg.svd(s_center, compute_uv=False)
+        not_passive = np.any(sigma > 1, axis=1)
+        if not np.any(not_passive):
+            return np.array([])
 
-        return np.array(violation_bands)
+        return np.stack((f_start, f_stop), axis=1)[not_passive]
 
     def _passivity_test_y(self) -> np.ndarray:
         """
@@ -1075,20 +1348,24 @@ class VectorFitting:
             Dhat = D - C @ Ahat @ B
             A, B, C, D = Ahat, Bhat, Chat, Dhat
         # D_inv = np.linalg.inv(D)
-        S1 = A @ (B @ np.linalg.inv(D) @ C - A)
+        S1 = A @ (B @ np.linalg.solve(D, C) - A)
         # bdc_comp = np.matmul(A, np.matmul(B, np.matmul(np.linalg.inv(D), C) - A))
         # S1 = A @ bdc_a
 
         wS1 = np.emath.sqrt(np.linalg.eigvals(S1))
         if np.any(np.linalg.eig(Dcmplx) == 0):
             wS1 = 1 / wS1
-        ind = np.where(np.imag(wS1) == 0, True, False)
+        ind = np.imag(wS1) == 0
         wS1 = wS1[ind].real
         sing_w = np.sort(wS1)
         if len(sing_w) == 0:
             return np.array(wintervals)
 
-        A, B, C, D, _ = self._get_ABCDE(for_passivity_enforcing=True)
+        # the midpoint scan below only needs C, B and D of the complex-valued diagonal form, which are taken directly
+        # from the pole-residue model instead of rebuilding the state-space model with _get_ABCDE()
+        C = self._all_residues[:1]
+        B = np.ones(shape=(C.shape[1], 1))
+        D = np.array([[np.real(self.constant_coeff[0])]])
         # Now we create a list of frequencies at midpoint of all the bands
         mid_w = np.zeros(len(sing_w) + 1)
         viol = np.zeros_like(mid_w)
@@ -1110,45 +1387,24 @@ class VectorFitting:
         #         C_comp[i, z] = C[i, z] + 1j * C[i, z + 1]
         #         C_comp[i, z + 1] = C[i, z] - 1j * C[i, z + 1]
         #         z += 2
-        for k in range(len(mid_w)):
-            sk = 1j * mid_w[k]
-            # C = C * (1.0 / (sk - self.poles))
-            G = np.real((C * (1.0 / (sk - self.all_poles))) @ B + D)  # E is always zero in our situation
-            EE = np.linalg.eigvals(G)
-            if np.any(EE < 0):
-                viol[k] = 1
-            else:
-                viol[k] = 0
-        # Establishing intervals for passivity violations:
-
-        intervals = np.zeros((len(np.nonzero(viol)[0]), 2))
-        count = 0
-        for k in range(len(mid_w)):
-            if viol[k] == 1:
-                if k == 0:
-                    intervals[count, :] = np.array([0, sing_w[0]]).T
-                elif k == len(mid_w) - 1:
-                    intervals[count, :] = np.array([sing_w[k - 1], 1e16])
-                    # intervals[count, :] = np.concatenate(
-                    #     intervals, np.array([sing_w[k - 1], 1e16]).T
-                    # )
-                else:
-                    intervals[count, :] = np.array([sing_w[k - 1], sing_w[k]]).T
-                count += 1
+        # all midpoints are evaluated at once as a stack of matrices G
+        sk = 1j * mid_w[:, None]
+        G = np.real(np.matmul(C[None, :, :] * (1.0 / (sk - self.all_poles))[:, None, :], B) + D)  # E is always zero
+        EE = np.linalg.eigvals(G)
+        viol[np.any(EE < 0, axis=1)] = 1
+        # Establishing intervals for passivity violations: band k spans from sing_w[k - 1] to sing_w[k], with the first
+        # band starting at dc and the last band stopping at "infinity"
+        band_edges = np.concatenate(([0], sing_w, [1e16]))
+        intervals = np.stack((band_edges[:-1], band_edges[1:]), axis=1)[viol == 1]
 
         if len(intervals) == 0:
             return np.array(wintervals)
-        killindex = []
-        for k in range(1, len(intervals)):
-            if intervals[k - 1, 1] == intervals[k, 1]:  # An overlap exists
-
-                intervals[k - 1, 1] = intervals[k, 1]  # Extending interval
-                intervals[k, :] = intervals[k - 1, :]
-                killindex.append(k - 1)
 
-        if len(killindex) != 0:
-            intervals = np.delete(intervals, killindex, axis=0)
-        wintervals = intervals
+        # merge overlapping and adjacent intervals; the intervals are sorted, so a new interval begins wherever the
+        # start lies beyond the greatest stop of all preceding intervals
+        is_new = np.append(True, intervals[1:, 0] > np.maximum.accumulate(intervals[:-1, 1]))
+        i_new = np.flatnonzero(is_new)
+        wintervals = np.stack((intervals[i_new, 0], np.maximum.reduceat(intervals[:, 1], i_new)), axis=1)
         return wintervals
 
     def _passivity_test_r(self) -> np.ndarray:
@@ -1214,17 +1470,16 @@ class VectorFitting:
         :rtype: List[Tuple]
         """
 
-        intervals = []
-        i = 0
-        while i < len(violations):
-            min_index = violations[i]
-            while i < len(violations) - 1 and violations[i] + 1 == violations[i + 1]:
-                i += 1
-            max_index = violations[i]
-            intervals.append((min_index, max_index))
-            i += 1
+        violations = np.asarray(violations)
+        if len(violations) == 0:
+            return np.array([])
+
+        # an interval ends wherever the next index is not the direct successor
+        breaks = np.flatnonzero(np.diff(violations) != 1)
+        min_indices = violations[np.concatenate(([0], breaks + 1))]
+        max_indices = violations[np.concatenate((breaks, [len(violations) - 1]))]
 
-        return np.array(intervals)
+        return np.stack((min_indices, max_indices), axis=1)
 
     def is_passive(self, parameter_type: str = "s") -> bool:
         """
@@ -1257,29 +1512,24 @@ class VectorFitting:
         >>> vf.is_passive() # returns True or False
         """
 
-        viol_bands = self.passivity_test(parameter_type)
-        if len(viol_bands) != 0:
-            return False
+        # the constant term D is the response at infinity; if it is not passive, the model cannot be passive and the
+        # full passivity test can be skipped
+        n_ports = int(np.sqrt(len(self.constant_coeff)))
+        D = np.array(self.constant_coeff, dtype=float).reshape((n_ports, n_ports))
+        if parameter_type.lower() == "r":
+            D_passive = np.all(np.abs(D) < 1.0)
+        elif parameter_type.lower() == "y":
+            D_passive = np.all(D > 0.0)
+        elif parameter_type.lower() == "s" and not np.any(self.proportional_coeff):
+            D_passive = np.all(np.linalg.svd(D, compute_uv=False) <= 1.0)
         else:
-            if parameter_type in ["r", "y"]:
-                _, _, _, D, _ = self._get_ABCDE()
-                if parameter_type == "r":
-                    if np.all(np.abs(D) < 1.0):
-                        return True
-                    else:
-                        return False
-                else:
-                    if np.all(D > 0.0):
-                        return True
-                    else:
-                        return False
-            else:
-                return True
+            # let passivity_test() raise the appropriate error
+            D_passive = True
+        if not D_passive:
+            return False
 
-        # if len(viol_bands) == 0:
-        #     return True
-        # else:
-        #     return False
+        viol_bands = self.passivity_test(parameter_type)
+        return len(viol_bands) == 0
 
     def passivity_enforce(self, n_samples: int = 200, f_max: float = None, parameter_type: str = "s") -> None:
         """
@@ -1397,7 +1647,7 @@ class VectorFitting:
         C_t = C
 
         # only include constant if it has been fitted (not zero)
-        if len(np.nonzero(D)[0]) == 0:
+        if not np.any(D):
             D_t = None
         else:
             D_t = D
@@ -1412,16 +1662,55 @@ class VectorFitting:
         else:
             delta = 0.999  # predefined tolerance parameter (users should not need to change this)
 
-        # calculate coefficient matrix
-        A_freq = np.linalg.inv(2j * np.pi * freqs_eval[:, None, None] * np.identity(dim_A)[None, :, :] - A[None, :, :])
-
-        # construct coefficient matrix with an extra column for the constants (if present)
+        # construct coefficient matrix (sI - A)^-1 * B with an extra column for the constants (if present)
         if D_t is not None:
-            coeffs = np.empty((len(freqs_eval), np.shape(B)[0] + 1, np.shape(B)[1]), dtype=complex)
-            coeffs[:, :-1, :] = np.matmul(A_freq, B[None, :, :])
+            coeffs = np.empty((len(freqs_eval), dim_A + 1, np.shape(B)[1]), dtype=complex)
             coeffs[:, -1, :] = 1
         else:
-            coeffs = np.matmul(A_freq, B[None, :, :])
+            coeffs = np.empty((len(freqs_eval), dim_A, np.shape(B)[1]), dtype=complex)
+        A_freq_B = coeffs[:, :dim_A, :]
+
+        # (sI - A)^-1 * B is written directly into the coefficient matrix, using the analytic inverse of the blocks of
+        # A if possible
+        s_freqs = 2j * np.pi * freqs_eval[:, None]
+        inv_blocks = self._get_block_inverse(s_freqs, A)
+        if inv_blocks is not None:
+            inv_diag, inv_upper, inv_lower, k0, k1 = inv_blocks
+            np.multiply(inv_diag[:, :, None], B, out=A_freq_B)
+            A_freq_B[:, k0] += inv_upper[:, :, None] * B[k1]
+            A_freq_B[:, k1] += inv_lower[:, :, None] * B[k0]
+        else:
+            # sI - A is built by adding s to the diagonal of -A
+            sI_A = np.negative(np.broadcast_to(A, (len(freqs_eval), dim_A, dim_A)), dtype=complex)
+            idx = np.arange(dim_A)
+            sI_A[:, idx, idx] += s_freqs
+            A_freq_B[:] = np.linalg.solve(sI_A, B[None, :, :])
+
+        # the perturbed residues of the responses S_{j,i} are fitted with the real-valued system matrix coeffs[:, :, i],
+        # which does not change during the iterations; its pseudo-inverse is calculated only once for all columns i.
+        # mind the transpose of the system to compensate for the exchanged order of matrix multiplication:
+        # wanting to solve S = C_t * coeffs
+        # but actually solving S = coeffs * C_t
+        # S = C_t * coeffs <==> transpose(S) = transpose(coeffs) * transpose(C_t)
+        # the system matrices are rank deficient, so the cutoff of the small singular values matches np.linalg.lstsq()
+        coeffs_ri = np.moveaxis(np.concatenate((coeffs.real, coeffs.imag), axis=0), 2, 0)
+        coeffs_pinv = np.linalg.pinv(coeffs_ri, np.finfo(float).eps * max(np.shape(coeffs_ri)[1:]))
+
+        # calculate S-matrix at the evaluation frequencies (shape fxNxN); it is linear in C_t and D_t, so it is only
+        # updated with their perturbations in the iterations below
+        if D_t is not None:
+            s_eval = self._get_s_from_ABCDE(freqs_eval, A, B, C_t, D_t, E)
+        else:
+            s_eval = self._get_s_from_ABCDE(freqs_eval, A, B, C_t, D, E)
+
+        # buffers for the right-hand side of the residue fit and its solution, which have the same shapes in all
+        # iterations; s_viol_ri[i, :, j] holds the real and imaginary parts of the violation response S_{j,i}
+        n_freqs = len(freqs_eval)
+        n_ports = np.shape(D)[0]
+        s_viol_ri = np.empty((n_ports, 2 * n_freqs, n_ports))
+        s_viol_re = np.moveaxis(s_viol_ri[:, :n_freqs, :], 0, 2)
+        s_viol_im = np.moveaxis(s_viol_ri[:, n_freqs:, :], 0, 2)
+        x = np.empty((n_ports, np.shape(coeffs_pinv)[1], n_ports))
 
         # iterative compensation of passivity violations
         t = 0
@@ -1429,54 +1718,46 @@ class VectorFitting:
         while t < self.max_iterations:
             logging.info("Passivity enforcement; Iteration {}".format(t + 1))
 
-            # calculate S-matrix at this frequency (shape fxNxN)
-            if D_t is not None:
-                s_eval = self._get_s_from_ABCDE(freqs_eval, A, B, C_t, D_t, E)
-            else:
-                s_eval = self._get_s_from_ABCDE(freqs_eval, A, B, C_t, D, E)
-
-            # singular value decomposition
-            u, sigma, vh = np.linalg.svd(s_eval, full_matrices=False)
+            # singular values only; the singular vectors are computed further below, but just at those frequencies
+            # where a perturbation is required
+            sigma = self._get_svd(s_eval, compute_uv=False)
 
             # keep track of the greatest singular value in every iteration step
             sigma_max = np.amax(sigma)
 
             # find and perturb singular values that cause passivity violations
-            idx_viol = np.nonzero(sigma > delta)
-            sigma_viol = np.zeros_like(sigma)
-            sigma_viol[idx_viol] = sigma[idx_viol] - delta
-
-            # construct a stack of diagonal matrices with the perturbed singular values on the diagonal
-            sigma_viol_diag = np.zeros_like(u, dtype=float)
-            idx_diag = np.arange(np.shape(sigma)[1])
-            sigma_viol_diag[:, idx_diag, idx_diag] = sigma_viol
-
-            # calculate violation S-responses
-            s_viol = np.matmul(np.matmul(u, sigma_viol_diag), vh)
-
-            # fit perturbed residues C_t for each response S_{i,j}
-            for i in range(np.shape(s_viol)[1]):
-                for j in range(np.shape(s_viol)[2]):
-                    # mind the transpose of the system to compensate for the exchanged order of matrix multiplication:
-                    # wanting to solve S = C_t * coeffs
-                    # but actually solving S = coeffs * C_t
-                    # S = C_t * coeffs <==> transpose(S) = transpose(coeffs) * transpose(C_t)
-
-                    # solve least squares (real-valued)
-                    x, residuals, rank, singular_vals = np.linalg.lstsq(
-                        np.vstack((np.real(coeffs[:, :, i]), np.imag(coeffs[:, :, i]))),
-                        np.hstack((np.real(s_viol[:, j, i]), np.imag(s_viol[:, j, i]))),
-                        rcond=None,
-                    )
-
-                    # perturb residues by subtracting respective row and column in C_t
-                    # one half of the solution will always be 0 due to construction of A and B
-                    # also perturb constants (if present)
-                    if D_t is not None:
-                        C_t[j, :] = C_t[j, :] - x[:-1]
-                        D_t[j, i] = D_t[j, i] - x[-1]
-                    else:
-                        C_t[j, :] = C_t[j, :] - x
+            idx_viol = sigma > delta
+            idx_freqs_viol = np.any(idx_viol, axis=1)
+
+            # calculate violation S-responses u * diag(sigma_viol) * vh; scaling the columns of u by the perturbed
+            # singular values avoids building a stack of diagonal matrices
+            # the real and imaginary parts are written directly into the right-hand side of the residue fit below
+            s_viol_ri.fill(0.0)
+            if np.any(idx_freqs_viol):
+                u, sigma, vh = self._get_svd(s_eval[idx_freqs_viol])
+                np.subtract(sigma, delta, out=sigma)
+                np.maximum(sigma, 0.0, out=sigma)
+                s_viol = np.matmul(u * sigma[:, None, :], vh)
+                s_viol_re[idx_freqs_viol] = s_viol.real
+                s_viol_im[idx_freqs_viol] = s_viol.imag
+
+            # fit perturbed residues C_t for all responses S_{j,i} (real-valued least squares), with x[i, :, j]
+            # holding the solution for response S_{j,i}
+            np.matmul(coeffs_pinv, s_viol_ri, out=x)
+
+            # perturb residues by subtracting respective row and column in C_t
+            # only the rows of x belonging to port i are nonzero due to construction of A and B
+            # also perturb constants (if present)
+            if D_t is not None:
+                delta_C_t = np.sum(x[:, :-1, :], axis=0).T
+                delta_D_t = x[:, -1, :].T
+                C_t -= delta_C_t
+                D_t -= delta_D_t
+                s_eval -= np.matmul(delta_C_t, A_freq_B) + delta_D_t
+            else:
+                delta_C_t = np.sum(x, axis=0).T
+                C_t -= delta_C_t
+                s_eval -= np.matmul(delta_C_t, A_freq_B)
 
             t += 1
             self.history_max_sigma.append(sigma_max)
@@ -1496,24 +1777,14 @@ class VectorFitting:
         # save/update model parameters (perturbed residues)
         self.history_max_sigma = np.array(self.history_max_sigma)
 
-        n_ports = np.shape(D)[0]
-        for i in range(n_ports):
-            k = 0  # column index in C_t
-            for j in range(n_ports):
-                i_response = i * n_ports + j
-                z = 0  # column index self.residues
-                for pole in self.poles:
-                    if np.imag(pole) == 0.0:
-                        # real pole --> real residue
-                        self.residues[i_response, z] = C_t[i, k]
-                        k += 1
-                    else:
-                        # complex-conjugate pole --> complex-conjugate residue
-                        self.residues[i_response, z] = C_t[i, k] + 1j * C_t[i, k + 1]
-                        k += 2
-                    z += 1
-                if D_t is not None:
-                    self.constant_coeff[i_response] = D_t[i, j]
+        # real pole --> real residue; complex-conjugate pole --> complex-conjugate residue
+        is_real, _, _, idx_pole = self._pole_classification
+        C_t = C_t.reshape((n_ports, n_ports, -1))
+        residues = C_t[:, :, idx_pole].astype(complex)
+        residues[:, :, ~is_real] += 1j * C_t[:, :, idx_pole[~is_real] + 1]
+        self.residues[:] = residues.reshape((n_ports ** 2, -1))
+        if D_t is not None:
+            self.constant_coeff[:] = D_t.ravel()
 
         # run final passivity test to make sure passivation was successful
         violation_bands = self.passivity_test()
@@ -1597,21 +1868,8 @@ class VectorFitting:
                     C1, D1 = self.FRPR(A0, B0, C0, D0, s, s2, s3)
                 else:
                     C1, D1 = self.FRPY(A0, B0, C0, D0, s, s2, s3, parameter_type=parameter_type)
-                k = 0
-                z = 0
-                flag = False
-                for pole in self.all_poles:
-                    if flag:
-                        flag = False
-                        continue
-                    if np.imag(pole) == 0.0:
-                        self.residues[0, z] = C1[0, k]
-                        k += 1
-                    else:
-                        self.residues[0, z] = np.real(C1[0, k]) + 1j * np.imag(C1[0, k])
-                        k += 2
-                        flag = True
-                    z += 1
+                # C1 holds the residues in the layout of all_poles; keep one residue per complex-conjugate pair
+                self.residues[0, :] = C1[0, self._pole_classification[3]]
                 # self.residues = C1.copy().astype(complex)
                 self.constant_coeff = D1.copy()
                 if iter_in != niter_in - 1:
@@ -1632,6 +1890,39 @@ class VectorFitting:
 
             iter_out += 1
 
+    @staticmethod
+    def _get_frp_basis(s_p_inv: np.ndarray, cindex: np.ndarray) -> np.ndarray:
+        """
+        Private method.
+        Returns the partial fraction basis of the residue perturbation in `FRPY()` and `FRPR()` from the reciprocals
+        1 / (s - p) of the complex frequencies s and the poles p in the layout of :attr:`all_poles`. Real poles
+        (`cindex == 0`) contribute 1 / (s - p); complex-conjugate pole pairs contribute 1 / (s - p) + 1 / (s - p*) for
+        the real part (`cindex == 1`) and j / (s - p*) - j / (s - p) for the imaginary part (`cindex == 2`) of their
+        residue.
+
+        Parameters
+        ----------
+        s_p_inv : ndarray
+            Reciprocals 1 / (s - p) (len(s) x len(all_poles)), which are also used to evaluate the model response.
+        cindex : ndarray
+            Type of each pole in `all_poles`.
+
+        Returns
+        -------
+        ndarray
+            Complex-valued basis (len(s) x len(all_poles)).
+        """
+
+        # the second pole of each complex-conjugate pair follows directly after the first one, so both parts of the
+        # pair are combined from the reciprocals 1 / (s - p) and 1 / (s - p*) of the two columns
+        basis = s_p_inv.copy()
+        i_cplx = np.flatnonzero(cindex == 1)
+        basis_p = s_p_inv[:, i_cplx]
+        basis_pconj = s_p_inv[:, i_cplx + 1]
+        basis[:, i_cplx] = basis_p + basis_pconj
+        basis[:, i_cplx + 1] = 1j * (basis_p - basis_pconj)
+        return basis
+
     def FRPY(self, A, B, C, D, s, s2, s3, parameter_type="y") -> Tuple[np.ndarray, np.ndarray]:
         """
         Function which modifies the elements in the C and D to enforce passivity
@@ -1642,428 +1933,7 @@ class VectorFitting:
         :rtype: Tuple[np.ndarray, np.ndarray]
         """
 
-        Cnew, Dnew = C.copy(), D.copy()
-        N = len(self.all_poles)
-
-        d = np.linalg.eigvals(D)
-        if parameter_type.lower() == "r":
-            violation = np.abs(d) > 1.0
-        else:
-            violation = d < 0
-        if violation:
-            Dflag = True
-            eigD, VD = np.linalg.eig(D)
-            invVD = np.linalg.inv(VD)
-        else:
-            Dflag = False
-
-        TOL = 1e-6
-        Ns = len(s)
-        Ns2 = len(s2)
-        Nc = len(D)  # This is 1 in all my use cases
-        Nc2 = Nc * Nc
-        I = np.identity(Nc)
-        Mmat = np.zeros(N + Dflag, dtype=complex)
-
-        cindex = np.zeros(N)
-        for m in range(N):
-            if np.imag(self.all_poles[m]) != 0:
-                if m == 0:
-                    cindex[m] = 1
-                else:
-                    if cindex[m - 1] == 0 or cindex[m - 1] == 2:
-                        cindex[m] = 1
-                        cindex[m + 1] = 2
-                    else:
-                        cindex[m] = 2
-
-        bigA = np.zeros((Ns, (N + Dflag)), dtype=complex)
-        bigV = np.zeros((1, N))
-        biginvV = np.zeros((1, N))
-        bigD = np.zeros((1, N))
-        for m in range(N):
-            R = C[:, m].copy()
-            if cindex[m] == 0:
-                R = R
-            elif cindex[m] == 1:
-                R = np.real(R)
-            else:
-                R = np.imag(R)
-            if len(R) == 1:
-                D_val, V = R, 1
-            else:
-                D_val, V = np.linalg.eig(R)
-            bigV[0, m] = V
-            if V == 1:
-                biginvV[0, m] = 1 / V
-            else:
-                biginvV[0, m] = np.linalg.inv(V)
-
-            bigD[:, m] = D_val
-
-        for k in range(Ns):
-            sk = s[k]
-            tell = 0
-            offs = 0
-            Yfit = self.fitcalcPRE(sk, C, D)
-
-            weight = 1 / np.abs(Yfit[0])
-
-            for m in range(N):
-                V = np.squeeze(bigV[:, m])
-                if V == 1:
-                    invV = 1
-                else:
-                    invV = np.linalg.inv(V)
-                if cindex[m] == 0:
-                    dum = 1 / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    dum = 1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m]))
-                else:
-                    dum = 1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m])
-
-                if V == 1:
-                    gamm = V
-                else:
-                    gamm = V @ invV
-                Mmat[offs] = gamm * weight * dum
-                offs += 1
-
-            if Dflag:
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD @ invV
-                gamm = VD @ invVD
-                Mmat[offs] = gamm * weight
-            bigA[k, :] = Mmat
-
-        # Now we introduce samples outside LS region: One sample per pole (s4)
-        s4 = []
-        # s4 = np.zeros(len(self.all_poles), dtype=complex)
-        tell = 0
-        for m in range(len(self.all_poles)):
-            if cindex[m] == 0:
-                if (np.abs(self.all_poles[m]) > s[Ns - 1] / 1j) or (np.abs(self.all_poles[m]) < s[0] / 1j):
-                    s4.append(1j * np.abs(self.all_poles[m]))
-                    tell += 1
-            elif cindex[m] == 1:
-                if (
-                    np.abs(np.imag(self.all_poles[m]) > s[Ns - 1] / 1j)
-                    or np.abs(np.imag(self.all_poles[m])) < s[0] / 1j
-                ):
-                    s4.append(1j * np.abs(np.imag(self.all_poles[m])))
-                    tell += 1
-        Ns4 = len(s4)
-
-        bigA2 = np.empty((Ns4, (N + Dflag)), dtype=complex)
-        weightfactor = 1e-3  # Weightfactor for out of band frequencies
-        for k in range(Ns4):
-            sk = s4[k]
-            tell = 0
-            offs = 0
-            Yfit = self.fitcalcPRE(sk, C, D)
-            weight = 1 / np.abs(Yfit[0])
-            weight = weight * weightfactor
-
-            for m in range(N):
-                V = np.squeeze(bigV[:, m])
-                if V == 1:
-                    invV = 1
-                else:
-                    invV = np.linalg.inv(V)
-                if cindex[m] == 0:
-                    dum = gamm / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    dum = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                else:
-                    dum = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                if V == 1:
-                    gamm = V
-                else:
-                    gamm = V @ invV
-                Mmat[m] = gamm * weight * dum
-                offs += 1
-            if Dflag:
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD @ invVD
-                Mmat[offs] = gamm * weight
-            bigA2[k, :] = Mmat
-        bigA = np.vstack((bigA, bigA2))
-
-        bigA = np.vstack((np.real(bigA), np.imag(bigA)))
-        Acol = len(bigA[0, :])
-        Escale = np.zeros(Acol)
-        for col in range(Acol):
-            Escale[col] = np.linalg.norm(bigA[:, col], ord=2)
-            bigA[:, col] = bigA[:, col] / Escale[col]
-        H = bigA.T @ bigA
-
-        Mmat2 = np.zeros((N + Dflag), dtype=complex)
-        viol_G = []
-        viol_D = []
-        # Loop for constraint problem, type 1 (violating eigenvalues in s2)
-        for k in range(Ns2):
-            sk = s2[k]
-            Y = D + np.sum(np.squeeze(C[0]) / (sk - self.all_poles))
-            if parameter_type.lower() == "r":
-                Z = np.abs(Y)
-                violation = Z > 1.0
-            else:
-                Z, eigvec = np.linalg.eig(np.real(Y))
-                violation = np.min(np.real(Z)) < 0
-
-            if violation:  # Any violations
-                offs = 0
-                for m in range(N):
-                    VV = bigV[:, m]
-                    invVV = biginvV[:, m]
-                    if VV == 1:
-                        gamm = VV
-                    else:
-                        gamm = VV @ invVV
-                    if cindex[m] == 0:
-                        Mmat2[offs] = gamm / (sk - self.all_poles[m])
-                    elif cindex[m] == 1:
-                        Mmat2[offs] = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                    else:
-                        Mmat2[offs] = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                    offs += 1
-                if Dflag:
-                    if VD == 1:
-                        gamm = VD
-                    else:
-                        gamm = VD @ invVD
-                    Mmat2[offs] = gamm
-                if V == 1:
-                    V1 = 1
-                else:
-                    V1 = V[:, 0]
-                qij = V1**2
-                Q = qij
-                if Q == 1:
-                    BB = Q * Mmat2
-                else:
-                    BB = Q @ Mmat2
-                if parameter_type.lower() == "r":
-                    delz = np.abs(Z)
-                    violation = delz > 1
-                else:
-                    delz = np.real(Z)
-                    violation = delz < 0
-                    # We need to be a bit different with bigC due to D
-                if violation:
-                    if parameter_type.lower() == "r":
-                        try:
-                            bigB = np.vstack((bigB, -BB))
-                        except:
-                            bigB = -BB.copy()
-                        try:
-                            bigC = np.vstack((bigC, 1 - delz - TOL))
-                        except:
-                            bigC = 1 - delz.copy() - TOL
-                    else:
-                        try:
-                            bigB = np.vstack((bigB, BB))
-                        except:
-                            bigB = BB.copy()
-                        try:
-                            bigC = np.vstack((bigC, -TOL + delz))
-                        except:
-                            bigC = -TOL + delz.copy()
-                    viol_G.append(delz)
-
-        # Loop for constraint problem (Type 2): all eigenvalues in s3
-        Ns3 = len(s3)
-        for k in range(Ns3):
-            sk = s3[k]
-            Y = D + np.sum(np.squeeze(C[0]) / (sk - self.all_poles))
-            if parameter_type.lower() == "r":
-                Z = np.abs(Y)
-            else:
-                Z, eigvec = np.linalg.eig(np.real(Y))
-
-            tell = 0
-            offs = 0
-
-            for m in range(N):
-                VV = bigV[:, m]
-                invVV = biginvV[:, m]
-                if VV == 1:
-                    gamm = VV
-                else:
-                    gamm = VV @ invVV
-                if cindex[m] == 0:
-                    Mmat2[offs] = gamm / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    Mmat2[offs] = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                else:
-                    Mmat2[offs] = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                offs += 1
-
-                tell = 0
-            if Dflag:
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD[:, 0] @ invVD[0, :]
-                Mmat2[offs] = gamm
-            if V == 1:
-                V1 = 1
-            else:
-                V1 = V[:, 0]
-            qij = V1**2
-            Q = qij
-            if Q == 1:
-                BB = Q * Mmat2
-            else:
-                BB = Q @ Mmat2
-
-            if parameter_type.lower() == "r":
-                delz = np.abs(Z)
-                violation = delz > 1
-            else:
-                delz = np.real(Z)
-                violation = delz < 0
-                # We need to be a bit different with bigC due to D
-            if violation:
-                if parameter_type.lower() == "r":
-                    try:
-                        bigB = np.vstack((bigB, -BB))
-                    except:
-                        bigB = -BB.copy()
-                    try:
-                        bigC = np.vstack((bigC, 1 - delz - TOL))
-                    except:
-                        bigC = 1 - delz.copy() - TOL
-                else:
-                    try:
-                        bigB = np.vstack((bigB, BB))
-                    except:
-                        bigB = BB.copy()
-                    try:
-                        bigC = np.vstack((bigC, -TOL + delz))
-                    except:
-                        bigC = -TOL + delz.copy()
-                viol_G.append(delz)
-            # delz = np.real(Z)
-            # if delz < 0:
-            #     try:
-            #         bigB = np.vstack((bigB, BB))
-            #     except:
-            #         bigB = BB.copy()
-            #     try:
-            #         bigC = np.vstack((bigC, -TOL + delz))
-            #     except:
-            #         bigC = -TOL + delz.copy()
-            #     viol_G.append(delz)
-        if parameter_type == "r":
-            try:
-                bigB = np.abs(bigB)
-            except:
-                pass
-            # bigB = np.sqrt(1 - np.square(np.real(bigB)) + np.square(np.imag(bigB)))
-        if Dflag:
-            if parameter_type.lower() == "r":
-                violation = np.abs(eigD) > 1
-            else:
-                violation = eigD < 0
-            if violation:
-                dum = np.zeros((N + Dflag))
-                dum[N] = 1
-                if parameter_type.lower() == "r":
-                    try:
-                        bigB = np.vstack((bigB, -dum))
-                    except:
-                        bigB = -dum.copy()
-                    try:
-                        bigC = np.vstack((bigC, 1 - np.abs(eigD) - TOL))
-                    except:
-                        bigC = 1 - np.abs(eigD) - TOL
-                else:
-                    try:
-                        bigB = np.vstack((bigB, dum))
-                    except:
-                        bigB = dum.copy()
-                    try:
-                        bigC = np.vstack((bigC, -TOL + eigD))
-                    except:
-                        bigC = -TOL + eigD.copy()
-                viol_G.append(eigD)
-                viol_D.append(eigD)
-
-        if len(bigB) == 0:
-            return Cnew, Dnew
-        ff = np.zeros(len(H))
-        bigB = np.reshape(bigB, (len(bigC), len(H)))
-        if len(bigC.shape) > 1:
-            if bigC.shape == (1, 1):
-                bigC = bigC[0]
-            else:
-                bigC = np.squeeze(bigC)
-
-        if parameter_type != "r":
-            bigB = np.real(bigB)
-        # if parameter_type == "r":
-        #     bigB = -np.abs(bigB)
-        #     # bigB = np.sqrt(1 - np.square(np.real(bigB)) + np.square(np.imag(bigB)))
-        # else:
-        #     bigB = np.real(bigB)
-
-        for col in range(len(H)):
-            if len(bigB) > 0:
-                bigB[:, col] = bigB[:, col] / Escale[col]
-
-        dx, f, xu, iterations, lagrangian, iact = quadprog.solve_qp(H, ff, bigB.T, -bigC)
-        dx = dx / Escale
-
-        Cnew = C.copy()
-        Dnew = D.copy()
-        bigV = bigV[0]
-        biginvV = biginvV[0]
-        for m in range(N):
-            if cindex[m] == 0:
-                if isinstance(dx[m], float):
-                    Diff1 = dx[m]
-                    Cnew[:, m] = Cnew[:, m] + bigV[m] * Diff1 * biginvV[m]
-                else:
-                    Diff1 = np.diag(np.array(dx[m]))
-                    Cnew[:, m] = Cnew[:, m] + bigV[:, m] @ Diff1 @ biginvV[:, m]
-            elif cindex[m] == 1:
-                GAMM1 = bigV[m]
-                GAMM2 = bigV[m + 1]
-                invGAMM1 = biginvV[m]
-                invGAMM2 = biginvV[(m + 1)]
-
-                R1 = np.real(C[:, m])
-                R2 = np.imag(C[:, m])
-                if isinstance(dx[m], float):
-                    Diff1 = dx[m]
-                    Diff2 = dx[m + 1]
-                    R1new = R1 + GAMM1 * Diff1 * invGAMM1
-                    R2new = R2 + GAMM2 * Diff2 * invGAMM2
-                else:
-                    Diff1 = np.diag(np.array(dx[m]))
-                    Diff2 = np.diag(np.array(dx[m + 1]))
-                    R1new = R1 + GAMM1 @ Diff1 @ invGAMM1
-                    R2new = R2 + GAMM2 @ Diff2 @ invGAMM2
-                Cnew[:, m] = R1new + 1j * R2new
-                Cnew[:, m + 1] = R1new - 1j * R2new
-        if Dflag:
-            if isinstance(dx[N], float):
-                DD = dx[N]
-                Dnew = Dnew + VD * DD * invVD
-            else:
-                DD = np.diag(dx[N])
-                Dnew = Dnew + VD @ DD @ invVD
-
-            Dnew = (Dnew + Dnew.T) / 2
-        for m in range(N):
-            Cnew[:, m] = (Cnew[:, m] + Cnew[:, m].T) / 2
-
-        return Cnew, Dnew
+        return self._perturb_frp(C, D, s, s2, s3, parameter_type, linearize_abs=False)
 
     def FRPR(self, A, B, C, D, s, s2, s3) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -2075,493 +1945,219 @@ class VectorFitting:
         :rtype: Tuple[np.ndarray, np.ndarray]
         """
 
+        return self._perturb_frp(C, D, s, s2, s3, "r", linearize_abs=True)
+
+    def _perturb_frp(self, C, D, s, s2, s3, parameter_type, linearize_abs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Private method.
+        Perturbs the residues C and the constant D of the one-port model to enforce passivity at the samples in s2 and
+        s3 while minimizing the perturbation of the model response at the samples in s. Used by `FRPY()` and `FRPR()`.
+
+        Parameters
+        ----------
+        C : ndarray
+            Residues in the layout of :attr:`all_poles`.
+        D : ndarray
+            Constant term.
+        s : ndarray
+            Complex frequencies of the least-squares region.
+        s2 : ndarray
+            Complex frequencies of the passivity violations.
+        s3 : ndarray
+            Complex frequencies of the local extrema of the violations.
+        parameter_type : str
+            Type of the model: `r` requires abs(Y) <= 1, anything else requires Re(Y) >= 0.
+        linearize_abs : bool
+            If True, abs(Y + dY) <= 1 is approximated by four linear conditions on the real and imaginary parts per
+            violating sample (`FRPR()`). Otherwise, there is only one condition per violating sample (`FRPY()`).
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray]
+            Perturbed residues C and constant D.
+        """
+
         Cnew, Dnew = C.copy(), D.copy()
-        N = len(self.all_poles)
+        is_r = parameter_type.lower() == "r"
 
-        d = np.linalg.eigvals(D)
-        violation = np.abs(d) > 1.0
+        all_poles = self.all_poles
+        all_poles_imag = all_poles.imag
+        N = len(all_poles)
+
+        Nc = len(D)  # This is 1 in all my use cases
+        if Nc == 1:
+            # the eigenvalue of the scalar constant is the constant itself with eigenvector 1
+            d = D[0]
+        else:
+            d = np.linalg.eigvals(D)
+        if is_r:
+            violation = np.abs(d) > 1.0
+        else:
+            violation = d < 0
         if violation:
             Dflag = True
-            eigD, VD = np.linalg.eig(D)
-            invVD = np.linalg.inv(VD)
+            if Nc == 1:
+                eigD, VD, invVD = d, np.ones((1, 1)), np.ones((1, 1))
+            else:
+                eigD, VD = np.linalg.eig(D)
+                invVD = np.linalg.inv(VD)
         else:
             Dflag = False
 
         TOL = 1e-6
         Ns = len(s)
-        Ns2 = len(s2)
-        Nc = len(D)  # This is 1 in all my use cases
-        Nc2 = Nc * Nc
-        I = np.identity(Nc)
-        Mmat = np.zeros(N + Dflag, dtype=complex)
 
+        # pole types in all_poles: real (0), complex (1) and its complex conjugate following directly after it (2)
+        is_real, _, _, idx_pole = self._pole_classification
         cindex = np.zeros(N)
-        for m in range(N):
-            if np.imag(self.all_poles[m]) != 0:
-                if m == 0:
-                    cindex[m] = 1
-                else:
-                    if cindex[m - 1] == 0 or cindex[m - 1] == 2:
-                        cindex[m] = 1
-                        cindex[m + 1] = 2
-                    else:
-                        cindex[m] = 2
-
-        bigA = np.zeros((Ns, (N + Dflag)), dtype=complex)
-        bigV = np.zeros((1, N))
-        biginvV = np.zeros((1, N))
-        bigD = np.zeros((1, N))
-        for m in range(N):
-            R = C[:, m].copy()
-            if cindex[m] == 0:
-                R = R
-            elif cindex[m] == 1:
-                R = np.real(R)
-            else:
-                R = np.imag(R)
-            if len(R) == 1:
-                D_val, V = R, 1
-            else:
-                D_val, V = np.linalg.eig(R)
-            bigV[0, m] = V
-            if V == 1:
-                biginvV[0, m] = 1 / V
-            else:
-                biginvV[0, m] = np.linalg.inv(V)
-
-            bigD[:, m] = D_val
-
-        for k in range(Ns):
-            sk = s[k]
-            tell = 0
-            offs = 0
-            Yfit = self.fitcalcPRE(sk, C, D)
-
-            weight = 1 / np.abs(Yfit[0])
+        cindex[idx_pole[~is_real]] = 1
+        cindex[idx_pole[~is_real] + 1] = 2
 
+        if Nc == 1:
+            # the eigenvectors of the scalar residues are trivially 1; no decompositions required
+            bigV = np.ones((1, N))
+            biginvV = np.ones((1, N))
+        else:
+            bigV = np.zeros((1, N))
+            biginvV = np.zeros((1, N))
             for m in range(N):
-                V = np.squeeze(bigV[:, m])
-                if V == 1:
-                    invV = 1
-                else:
-                    invV = np.linalg.inv(V)
-                if cindex[m] == 0:
-                    dum = 1 / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    dum = 1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m]))
-                else:
-                    dum = 1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m])
-
-                if V == 1:
-                    gamm = V
-                else:
-                    gamm = V @ invV
-                Mmat[offs] = gamm * weight * dum
-                offs += 1
+                R = C[:, m].copy()
+                if cindex[m] == 1:
+                    R = np.real(R)
+                elif cindex[m] == 2:
+                    R = np.imag(R)
+                D_val, V = np.linalg.eig(R)
+                bigV[0, m] = V
+                biginvV[0, m] = np.linalg.inv(V)
 
-            if Dflag:  # I probably need to add to this one, no don't think so
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD @ invV
-                gamm = VD @ invVD
-                Mmat[offs] = gamm * weight
-            bigA[k, :] = Mmat
-
-        # Now we introduce samples outside LS region: One sample per pole (s4)
-        s4 = []
-        # s4 = np.zeros(len(self.all_poles), dtype=complex)
-        tell = 0
-        for m in range(len(self.all_poles)):
-            if cindex[m] == 0:
-                if (np.abs(self.all_poles[m]) > s[Ns - 1] / 1j) or (np.abs(self.all_poles[m]) < s[0] / 1j):
-                    s4.append(1j * np.abs(self.all_poles[m]))
-                    tell += 1
-            elif cindex[m] == 1:
-                if (
-                    np.abs(np.imag(self.all_poles[m]) > s[Ns - 1] / 1j)
-                    or np.abs(np.imag(self.all_poles[m])) < s[0] / 1j
-                ):
-                    s4.append(1j * np.abs(np.imag(self.all_poles[m])))
-                    tell += 1
+        # all rows of the least-squares problem are built at once for the samples s and for the samples s4 outside of
+        # the least-squares region (one sample per pole), which get a lower weighting
+        w_min = s[0].imag
+        w_max = s[Ns - 1].imag
+        is_real_pole = cindex == 0
+        is_cplx_pole = cindex == 1
+        w_poles = np.where(is_real_pole, np.abs(all_poles), np.abs(all_poles_imag))
+        is_outside = is_real_pole & ((np.abs(all_poles) > w_max) | (np.abs(all_poles) < w_min))
+        is_outside |= is_cplx_pole & ((all_poles_imag > w_max) | (np.abs(all_poles_imag) < w_min))
+        s4 = 1j * w_poles[is_outside]
         Ns4 = len(s4)
+        s_ls = np.concatenate((s, s4))
 
-        bigA2 = np.empty((Ns4, (N + Dflag)), dtype=complex)
+        # weighting with the inverse magnitude of the fitted response
+        # the reciprocals 1 / (s - p) are shared by the response and the basis
+        s_p_inv = 1 / (s_ls[:, None] - all_poles)
+        weight = 1 / np.abs(D[0, 0] + np.sum(C * s_p_inv, axis=1))
         weightfactor = 1e-3  # Weightfactor for out of band frequencies
-        for k in range(Ns4):
-            sk = s4[k]
-            tell = 0
-            offs = 0
-            Yfit = self.fitcalcPRE(sk, C, D)
-            weight = 1 / np.abs(Yfit[0])
-            weight = weight * weightfactor
+        weight[Ns:] = weight[Ns:] * weightfactor
 
-            for m in range(N):
-                V = np.squeeze(bigV[:, m])
-                if V == 1:
-                    invV = 1
-                else:
-                    invV = np.linalg.inv(V)
-                if cindex[m] == 0:
-                    dum = gamm / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    dum = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                else:
-                    dum = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                if V == 1:
-                    gamm = V
-                else:
-                    gamm = V @ invV
-                Mmat[m] = gamm * weight * dum
-                offs += 1
-            if Dflag:  # I might need to add to this one here, nope I don't think so
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD @ invVD
-                Mmat[offs] = gamm * weight
-            bigA2[k, :] = Mmat
-        bigA = np.vstack((bigA, bigA2))
-
-        bigA = np.vstack((np.real(bigA), np.imag(bigA)))  # Is this something I need to think about?
-        Acol = len(bigA[0, :])
-        Escale = np.zeros(Acol)
-        for col in range(Acol):
-            Escale[col] = np.linalg.norm(bigA[:, col], ord=2)
-            bigA[:, col] = bigA[:, col] / Escale[col]
-        H = bigA.T @ bigA
-
-        Mmat2 = np.zeros((N + Dflag), dtype=complex)
-        viol_G = []
-        viol_D = []
-        # Loop for constraint problem, type 1 (violating eigenvalues in s2)
-        for k in range(Ns2):
-            sk = s2[k]
-            Y = D + np.sum(np.squeeze(C[0]) / (sk - self.all_poles))
-            Z = np.abs(Y)
-            violation = Z > 1.0
-
-            if violation:  # Any violations
-                offs = 0
-                for m in range(N):
-                    VV = bigV[:, m]
-                    invVV = biginvV[:, m]
-                    if VV == 1:
-                        gamm = VV
-                    else:
-                        gamm = VV @ invVV
-                    if cindex[m] == 0:
-                        Mmat2[offs] = gamm / (sk - self.all_poles[m])
-                    elif cindex[m] == 1:
-                        Mmat2[offs] = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                    else:
-                        Mmat2[offs] = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                    offs += 1
-                if Dflag:
-                    if VD == 1:
-                        gamm = VD
-                    else:
-                        gamm = VD @ invVD
-                    Mmat2[offs] = gamm
-                if V == 1:
-                    V1 = 1
-                else:
-                    V1 = V[:, 0]
-                qij = V1**2
-                Q = qij
-                if Q == 1:
-                    BB = Q * Mmat2
-                else:
-                    BB = Q @ Mmat2
-                delz = Z
-                violation = np.abs(delz) > 1
-                # else:
-                #     delz = np.real(Z)
-                #     violation = delz < 0
-                # We need to be a bit different with bigC due to D
-                if violation:
-                    # We approximate abs(Y + dY) < 1 with four conditions
-                    # 1. Re(Y) + Re(dY) + Im(Y) + Im(dY) < 1
-                    try:
-                        bigB = np.vstack(
-                            (bigB, np.real(BB) + np.imag(BB))
-                        )  # I'm putting -BB here, need to keep in mind
-                    except:
-                        bigB = np.real(BB) + np.imag(BB)
-                    try:
-                        bigC = np.vstack((bigC, 1 - np.real(delz) - np.imag(delz) - TOL))  # Make-ar thetta sense?
-                    except:
-                        bigC = 1 - np.real(delz) - np.imag(delz) - TOL
-                    # 2. -Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
-                    try:
-                        bigB = np.vstack(
-                            (bigB, np.real(BB) + np.imag(BB))
-                        )  # I'm putting -BB here, need to keep in mind
-                    except:
-                        bigB = np.real(BB) + np.imag(BB)
-                    try:
-                        bigC = np.vstack((bigC, 1 + np.real(delz) + np.imag(delz) - TOL))  # Make-ar thetta sense?
-                    except:
-                        bigC = 1 + np.real(delz) + np.imag(delz) - TOL
-                    # 3. -Re(Y) + Re(dY) + Im(Y) + Im(dY) < 1
-                    try:
-                        bigB = np.vstack(
-                            (bigB, np.real(BB) + np.imag(BB))
-                        )  # I'm putting -BB here, need to keep in mind
-                    except:
-                        bigB = np.real(BB) + np.imag(BB)
-                    try:
-                        bigC = np.vstack((bigC, 1 + np.real(delz) - np.imag(delz) - TOL))  # Make-ar thetta sense?
-                    except:
-                        bigC = 1 - np.real(delz) + np.imag(delz) - TOL
-                    # 4. Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
-                    try:
-                        bigB = np.vstack(
-                            (bigB, np.real(BB) + np.imag(BB))
-                        )  # I'm putting -BB here, need to keep in mind
-                    except:
-                        bigB = np.real(BB) + np.imag(BB)
-                    try:
-                        bigC = np.vstack((bigC, 1 - np.real(delz) + np.imag(delz) - TOL))  # Make-ar thetta sense?
-                    except:
-                        bigC = 1 - np.real(delz) + np.imag(delz) - TOL
-                    # else:
-                    #     try:
-                    #         bigB = np.vstack((bigB, BB))
-                    #     except:
-                    #         bigB = BB.copy()
-                    #     try:
-                    #         bigC = np.vstack((bigC, -TOL + delz))
-                    #     except:
-                    #         bigC = -TOL + delz.copy()
-                    viol_G.append(delz)
-
-        # Loop for constraint problem (Type 2): all eigenvalues in s3
-        Ns3 = len(s3)
-        for k in range(Ns3):
-            sk = s3[k]
-            Y = D + np.sum(np.squeeze(C[0]) / (sk - self.all_poles))
-            # if parameter_type.lower() == "r":
-            Z = np.abs(Y)
-            # else:
-            #     Z, eigvec = np.linalg.eig(np.real(Y))
-
-            tell = 0
-            offs = 0
-
-            for m in range(N):
-                VV = bigV[:, m]
-                invVV = biginvV[:, m]
-                if VV == 1:
-                    gamm = VV
-                else:
-                    gamm = VV @ invVV
-                if cindex[m] == 0:
-                    Mmat2[offs] = gamm / (sk - self.all_poles[m])
-                elif cindex[m] == 1:
-                    Mmat2[offs] = gamm * (1 / (sk - self.all_poles[m]) + 1 / (sk - np.conj(self.all_poles[m])))
-                else:
-                    Mmat2[offs] = gamm * (1j / (sk - np.conj(self.all_poles[m])) - 1j / (sk - self.all_poles[m]))
-                offs += 1
+        gamm = bigV[0] * biginvV[0]
+        bigA = np.empty((Ns + Ns4, N + Dflag), dtype=complex)
+        bigA[:, :N] = gamm * weight[:, None] * self._get_frp_basis(s_p_inv, cindex)
+        if Dflag:
+            bigA[:, N] = np.squeeze(VD @ invVD) * weight
 
-                tell = 0
-            if Dflag:
-                if VD == 1:
-                    gamm = VD
-                else:
-                    gamm = VD[:, 0] @ invVD[0, :]
-                Mmat2[offs] = gamm
-            if V == 1:
-                V1 = 1
-            else:
-                V1 = V[:, 0]
-            qij = V1**2
-            Q = qij
-            if Q == 1:
-                BB = Q * Mmat2
+        bigA = np.vstack((np.real(bigA), np.imag(bigA)))
+        # columns are normalized to unit length
+        Escale = np.linalg.norm(bigA, axis=0)
+        bigA /= Escale
+
+        # quadprog takes the inverse of the upper triangular factor R of H = bigA.T @ bigA = R.T @ R, which is obtained
+        # from a QR decomposition of bigA without forming H
+        R = np.linalg.qr(bigA, mode="r")
+        R_inv = linalg.solve_triangular(R, np.identity(len(R)))
+
+        # constraint rows bigB @ dx >= -bigC for the samples in s2 and s3 and for D
+        # the response of the one-port model is evaluated at all samples at once; only the samples with a violation
+        # get constraint rows
+        s23 = np.concatenate((s2, s3))
+        s_p_inv = 1 / (s23[:, None] - all_poles)
+        Y = D[0, 0] + np.sum(C[0] * s_p_inv, axis=1)
+        if is_r:
+            delz = np.abs(Y)
+            is_viol = delz > 1
+        else:
+            delz = np.real(Y)
+            is_viol = delz < 0
+        delz = delz[is_viol]
+        n_viol = len(delz)
+        BB = np.empty((n_viol, N + Dflag), dtype=complex)
+        BB[:, :N] = gamm * self._get_frp_basis(s_p_inv[is_viol], cindex)
+        if Dflag:
+            BB[:, N] = np.squeeze(VD @ invVD)
+
+        # rows per violating sample and for a violating D
+        n_cond = 4 if linearize_abs else 1
+        n_cond_D = 2 if linearize_abs else 1
+        n_rows = n_cond * n_viol
+        bigB = np.empty((n_rows + n_cond_D * Dflag, N + Dflag))
+        bigC = np.empty((n_rows + n_cond_D * Dflag, 1))
+        if linearize_abs:
+            # We approximate abs(Y + dY) < 1 with four conditions
+            # 1. Re(Y) + Re(dY) + Im(Y) + Im(dY) < 1
+            # 2. -Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
+            # 3. -Re(Y) + Re(dY) + Im(Y) + Im(dY) < 1
+            # 4. Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
+            # the four conditions share the same row Re(dY) + Im(dY), which is computed once for all violating samples
+            # and negated for the form bigB @ dx >= -bigC
+            BB_row = -(np.real(BB) + np.imag(BB))
+            for i_cond in range(4):
+                bigB[i_cond:n_rows:4] = BB_row
+            bigC[0:n_rows:4, 0] = 1 - np.real(delz) - np.imag(delz) - TOL
+            bigC[1:n_rows:4, 0] = 1 + np.real(delz) + np.imag(delz) - TOL
+            bigC[2:n_rows:4, 0] = 1 + np.real(delz) - np.imag(delz) - TOL
+            bigC[3:n_rows:4, 0] = 1 - np.real(delz) + np.imag(delz) - TOL
+        elif is_r:
+            # magnitudes of the sample rows
+            np.abs(BB, out=bigB[:n_rows])
+            bigC[:n_rows, 0] = 1 - delz - TOL
+        else:
+            # real parts of the sample rows
+            bigB[:n_rows] = np.real(BB)
+            bigC[:n_rows, 0] = -TOL + delz
+        if Dflag:
+            if is_r:
+                violation = np.abs(eigD) > 1
             else:
-                BB = Q @ Mmat2
-
-            # if parameter_type.lower() == "r":
-            delz = np.abs(Z)
-            violation = delz > 1
-            # else:
-            #     delz = np.real(Z)
-            #     violation = delz < 0
-            # We need to be a bit different with bigC due to D
-            if violation:
-                try:
-                    bigB = np.vstack((bigB, np.real(BB) + np.imag(BB)))  # I'm putting -BB here, need to keep in mind
-                except:
-                    bigB = np.real(BB) + np.imag(BB)
-                try:
-                    bigC = np.vstack((bigC, 1 - np.real(delz) - np.imag(delz) - TOL))  # Make-ar thetta sense?
-                except:
-                    bigC = 1 - np.real(delz) - np.imag(delz) - TOL
-                # 2. -Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
-                try:
-                    bigB = np.vstack((bigB, np.real(BB) + np.imag(BB)))  # I'm putting -BB here, need to keep in mind
-                except:
-                    bigB = np.real(BB) + np.imag(BB)
-                try:
-                    bigC = np.vstack((bigC, 1 + np.real(delz) + np.imag(delz) - TOL))  # Make-ar thetta sense?
-                except:
-                    bigC = 1 + np.real(delz) + np.imag(delz)
-                # 3. -Re(Y) + Re(dY) + Im(Y) + Im(dY) < 1
-                try:
-                    bigB = np.vstack((bigB, np.real(BB) + np.imag(BB)))  # I'm putting -BB here, need to keep in mind
-                except:
-                    bigB = np.real(BB) + np.imag(BB)
-                try:
-                    bigC = np.vstack((bigC, 1 + np.real(delz) - np.imag(delz) - TOL))  # Make-ar thetta sense?
-                except:
-                    bigC = 1 - np.real(delz) + np.imag(delz) - TOL
-                # 4. Re(Y) + Re(dY) - Im(Y) + Im(dY) < 1
-                try:
-                    bigB = np.vstack((bigB, np.real(BB) + np.imag(BB)))  # I'm putting -BB here, need to keep in mind
-                except:
-                    bigB = np.real(BB) + np.imag(BB)
-                try:
-                    bigC = np.vstack((bigC, 1 - np.real(delz) + np.imag(delz) - TOL))  # Make-ar thetta sense?
-                except:
-                    bigC = 1 - np.real(delz) + np.imag(delz) - TOL
-                # try:
-                #     bigB = np.vstack((bigB, -BB))
-                # except:
-                #     bigB = -BB.copy()
-                # try:
-                #     bigC = np.vstack((bigC, 1 - delz - TOL))
-                # except:
-                #     bigC = 1 - delz.copy() - TOL
-                # else:
-                #     try:
-                #         bigB = np.vstack((bigB, BB))
-                #     except:
-                #         bigB = BB.copy()
-                #     try:
-                #         bigC = np.vstack((bigC, -TOL + delz))
-                #     except:
-                #         bigC = -TOL + delz.copy()
-                viol_G.append(delz)
-            # delz = np.real(Z)
-            # if delz < 0:
-            #     try:
-            #         bigB = np.vstack((bigB, BB))
-            #     except:
-            #         bigB = BB.copy()
-            #     try:
-            #         bigC = np.vstack((bigC, -TOL + delz))
-            #     except:
-            #         bigC = -TOL + delz.copy()
-            #     viol_G.append(delz)
-        # if parameter_type == "r":
-        # try:
-        #     bigB = np.abs(bigB)
-        # except:
-        #     pass
-        # bigB = np.sqrt(1 - np.square(np.real(bigB)) + np.square(np.imag(bigB)))
-        if Dflag:  # This is the only place where I need to add the extra D condition
-            # if parameter_type.lower() == "r":
-            violation = np.abs(eigD) > 1
-            # else:
-            #     violation = eigD < 0
+                violation = eigD < 0
             if violation:
                 dum = np.zeros((N + Dflag))
                 dum[N] = 1
-                # if parameter_type.lower() == "r":
-
-                # First condition: D < 1 - tol
-                try:
-                    bigB = np.vstack((bigB, dum))
-                except:
-                    bigB = dum.copy()
-                try:
-                    bigC = np.vstack((bigC, 1 - eigD - TOL))
-                except:
-                    bigC = 1 - eigD - TOL
-
-                # 2nd condition: D > -1 + tol
-                try:
-                    bigB = np.vstack((bigB, -dum))
-                except:
-                    bigB = -dum.copy()
-                try:
-                    bigC = np.vstack((bigC, 1 + eigD - TOL))
-                except:
-                    bigC = 1 + eigD - TOL
-
-                # else:
-                #     try:
-                #         bigB = np.vstack((bigB, dum))
-                #     except:
-                #         bigB = dum.copy()
-                #     try:
-                #         bigC = np.vstack((bigC, -TOL + eigD))
-                #     except:
-                #         bigC = -TOL + eigD.copy()
-                viol_G.append(eigD)
-                viol_D.append(eigD)
-
-        if len(bigB) == 0:
+                if linearize_abs:
+                    # First condition: D < 1 - tol
+                    bigB[n_rows] = -dum
+                    bigC[n_rows] = 1 - eigD - TOL
+
+                    # 2nd condition: D > -1 + tol
+                    bigB[n_rows + 1] = dum
+                    bigC[n_rows + 1] = 1 + eigD - TOL
+                elif is_r:
+                    bigB[n_rows] = -dum
+                    bigC[n_rows] = 1 - np.abs(eigD) - TOL
+                else:
+                    bigB[n_rows] = dum
+                    bigC[n_rows] = -TOL + eigD
+                n_rows += n_cond_D
+
+        if n_rows == 0:
             return Cnew, Dnew
-        ff = np.zeros(len(H))
-        bigB = np.reshape(bigB, (len(bigC), len(H)))
-        if len(bigC.shape) > 1:
-            if bigC.shape == (1, 1):
-                bigC = bigC[0]
-            else:
-                bigC = np.squeeze(bigC)
-
-        # I have to take a look there what to do regarding the commented block below
-
-        # if parameter_type != "r":
-        # bigB = np.real(bigB)
-        # if parameter_type == "r":
-        #     bigB = -np.abs(bigB)
-        #     # bigB = np.sqrt(1 - np.square(np.real(bigB)) + np.square(np.imag(bigB)))
-        # else:
-        #     bigB = np.real(bigB)
-
-        for col in range(len(H)):
-            if len(bigB) > 0:
-                bigB[:, col] = bigB[:, col] / Escale[col]
-        dx, f, xu, iterations, lagrangian, iact = quadprog.solve_qp(H, ff, -bigB.T, -bigC)
+        ff = np.zeros(len(R_inv))
+        bigB = bigB[:n_rows]
+        bigC = bigC[:n_rows, 0]
+
+        bigB /= Escale
+
+        dx, f, xu, iterations, lagrangian, iact = quadprog.solve_qp(R_inv, ff, bigB.T, -bigC, factorized=True)
         dx = dx / Escale
 
-        Cnew = C.copy()
-        Dnew = D.copy()
-        bigV = bigV[0]
-        biginvV = biginvV[0]
-        for m in range(N):
-            if cindex[m] == 0:
-                if isinstance(dx[m], float):
-                    Diff1 = dx[m]
-                    Cnew[:, m] = Cnew[:, m] + bigV[m] * Diff1 * biginvV[m]
-                else:
-                    Diff1 = np.diag(np.array(dx[m]))
-                    Cnew[:, m] = Cnew[:, m] + bigV[:, m] @ Diff1 @ biginvV[:, m]
-            elif cindex[m] == 1:
-                GAMM1 = bigV[m]
-                GAMM2 = bigV[m + 1]
-                invGAMM1 = biginvV[m]
-                invGAMM2 = biginvV[(m + 1)]
-
-                R1 = np.real(C[:, m])
-                R2 = np.imag(C[:, m])
-                if isinstance(dx[m], float):
-                    Diff1 = dx[m]
-                    Diff2 = dx[m + 1]
-                    R1new = R1 + GAMM1 * Diff1 * invGAMM1
-                    R2new = R2 + GAMM2 * Diff2 * invGAMM2
-                else:
-                    Diff1 = np.diag(np.array(dx[m]))
-                    Diff2 = np.diag(np.array(dx[m + 1]))
-                    R1new = R1 + GAMM1 @ Diff1 @ invGAMM1
-                    R2new = R2 + GAMM2 @ Diff2 @ invGAMM2
-                Cnew[:, m] = R1new + 1j * R2new
-                Cnew[:, m + 1] = R1new - 1j * R2new
+        # perturbed residues: real poles directly, complex-conjugate pairs by their real (m) and imaginary (m + 1) part
+        is_cplx = np.flatnonzero(cindex == 1)
+        delta_C = bigV[0] * dx[:N] * biginvV[0]
+        Cnew[:, cindex == 0] += delta_C[cindex == 0]
+        Cnew[:, is_cplx] = C[:, is_cplx] + (delta_C[is_cplx] + 1j * delta_C[is_cplx + 1])
+        Cnew[:, is_cplx + 1] = np.conj(Cnew[:, is_cplx])
         if Dflag:
-            if isinstance(dx[N], float):
+            if Nc == 1:
+                # scalar constant with unit eigenvector
                 DD = dx[N]
                 Dnew = Dnew + VD * DD * invVD
             else:
@@ -2569,8 +2165,7 @@ class VectorFitting:
                 Dnew = Dnew + VD @ DD @ invVD
 
             Dnew = (Dnew + Dnew.T) / 2
-        for m in range(N):
-            Cnew[:, m] = (Cnew[:, m] + Cnew[:, m].T) / 2
+
         return Cnew, Dnew
 
     def fitcalcPRE(self, sk, C, D):
@@ -2586,7 +2181,6 @@ class VectorFitting:
         g_pass = []
         A, B, C, D, _ = self._get_ABCDE(for_passivity_enforcing=True)
         sss = []
-        Nc = len(D)
         g_pass = 1e16
         smin = 0
         for m in range(len(violation_bands)):
@@ -2604,55 +2198,24 @@ class VectorFitting:
                 s_pass2 = 1j * np.logspace(np.log10(w1), np.log10(w2), Nint)
             s_pass = np.sort_complex(np.concatenate((s_pass1, s_pass2), axis=0))
             Nint *= 2
-            EE = np.zeros((1, Nint))
-            for k in range(len(s_pass)):
-                Y = (C * (1.0 / (s_pass[k] - self.all_poles))) @ B + D
-                if parameter_type.lower() == "r":
-                    G = np.abs(Y)
-                else:
-                    G = np.real(Y)
-                EV, T0 = np.linalg.eig(G)
-                if k == 0:
-                    old_T0 = np.zeros_like(T0)
-                old_T0 = T0
-                EE[:, k] = np.diag(EV)
+            # responses at all samples of the band (Nint x Nc x Nc) and their eigenvalues (Nc x Nint)
+            Y = np.matmul(C * (1.0 / (s_pass[:, None, None] - self.all_poles)), B) + D
+            if parameter_type.lower() == "r":
+                G = np.abs(Y)
+            else:
+                G = np.real(Y)
+            EE = np.real(np.linalg.eigvals(G).T)
             # Identifying violations, picking minima for s2
-            s_pass_ind = np.zeros(shape=(len(s_pass)))
-            # if parameter_type.lower() == "r":
-            #     if np.max(EE[0]) > 1.0:
-            #         s_pass_ind_2 = np.where(EE[0] == np.max(EE[0]))[0]
-            #     else:
-            #         s_pass_ind_2 = np.zeros(shape=(len(s_pass)))
-            #     if isinstance(s_pass_ind_2, (np.ndarray, list)):
-            #         # if len(s_pass_ind_2) > 1:
-            #         s_pass_ind_2 = s_pass_ind_2[0]
-            # else:
-            for row in range(Nc):
-                if parameter_type == "r":
-                    if EE[row, 0] > 1:
-                        s_pass_ind[0] = 1
-                else:
-                    if EE[row, 0] < 0:
-                        s_pass_ind[0] = 1
-            for k in range(1, len(s_pass) - 1):
-                for row in range(Nc):
-                    if parameter_type == "r":
-                        if EE[row, k] > 1:
-                            if EE[row, k] > EE[row, k - 1] and EE[row, k] > EE[row, k + 1]:
-                                s_pass_ind[k] = 1
-                    else:
-                        if EE[row, k] < 0:  # Violation
-                            if EE[row, k] < EE[row, k - 1] and EE[row, k] < EE[row, k + 1]:
-                                s_pass_ind[k] = 1
-            # if parameter_type == "r":
-            #     flotti = np.where(EE == np.max(EE))[0]
-            #     s_pass_ind[flotti] = 1
-            # breakpoint()
-            for s_p in s_pass[np.where(s_pass_ind == 1)[0]]:
-                sss.append(s_p)
-            # for s_p in s_pass[np.where(s_pass_ind == 1)[0]]:
-            #     s.append(s_p)
-            # sss.append(s_pass[s_pass_ind_2])
+            # (maxima above 1 for r); the first sample counts if it is in violation
+            s_pass_ind = np.zeros(len(s_pass), dtype=bool)
+            EE_inner = EE[:, 1:-1]
+            if parameter_type == "r":
+                s_pass_ind[0] = np.any(EE[:, 0] > 1)
+                s_pass_ind[1:-1] = np.any((EE_inner > 1) & (EE_inner > EE[:, :-2]) & (EE_inner > EE[:, 2:]), axis=0)
+            else:
+                s_pass_ind[0] = np.any(EE[:, 0] < 0)
+                s_pass_ind[1:-1] = np.any((EE_inner < 0) & (EE_inner < EE[:, :-2]) & (EE_inner < EE[:, 2:]), axis=0)
+            sss.extend(s_pass[s_pass_ind])
             if parameter_type == "r":
                 dum = np.max(EE[0], axis=0)
                 g_pass_2, ind = np.max(dum), np.where(dum == np.max(dum))[0][0]
@@ -2679,7 +2242,7 @@ class VectorFitting:
 
         return s_pass, g_pass, smin
 
-    def write_npz(self, path: str) -> None:
+    def write_npz(self, path: str, compress: bool = False) -> None:
         """
         Writes the model parameters in :attr:`poles`, :attr:`residues`,
         :attr:`proportional_coeff` and :attr:`constant_coeff` to a labeled NumPy .npz file.
@@ -2690,6 +2253,10 @@ class VectorFitting:
             Target path without filename for the export. The filename will be added automatically based on the network
             name in :attr:`network`
 
+        compress : bool, optional
+            Enables the compression of the arrays in the .npz file. The dense floating point coefficients hardly
+            compress, so this is disabled by default to save the time for the compression of large models.
+
         Returns
         -------
         None
@@ -2751,8 +2318,13 @@ class VectorFitting:
 
         filename = self.network.name
 
-        logging.info("Exporting results as compressed NumPy array to {}".format(path))
-        np.savez_compressed(
+        if compress:
+            logging.info("Exporting results as compressed NumPy array to {}".format(path))
+            savez = np.savez_compressed
+        else:
+            logging.info("Exporting results as NumPy array to {}".format(path))
+            savez = np.savez
+        savez(
             os.path.join(path, "coefficients_{}".format(filename)),
             poles=self.poles,
             residues=self.residues,
@@ -2863,50 +2435,83 @@ class VectorFitting:
         >>> s11_fit = vf.get_model_response(0, 0, numpy.linspace(0, 10e9, 101))
         """
 
-        if self.poles is None:
-            warnings.warn(
-                "Returning a zero-vector; Poles have not been fitted.",
-                RuntimeWarning,
-                stacklevel=2,
-            )
-            return np.zeros_like(freqs)
-        if self.residues is None:
-            warnings.warn(
-                "Returning a zero-vector; Residues have not been fitted.",
-                RuntimeWarning,
-                stacklevel=2,
-            )
-            return np.zeros_like(freqs)
-        if self.proportional_coeff is None:
-            warnings.warn(
-                "Returning a zero-vector; Proportional coefficients have not been fitted.",
-                RuntimeWarning,
-                stacklevel=2,
-            )
-            return np.zeros_like(freqs)
-        if self.constant_coeff is None:
-            warnings.warn(
-                "Returning a zero-vector; Constants have not been fitted.",
-                RuntimeWarning,
-                stacklevel=2,
-            )
-            return np.zeros_like(freqs)
         if freqs is None:
             freqs = np.linspace(np.amin(self.network.f), np.amax(self.network.f), 1000)
 
-        s = 2j * np.pi * np.array(freqs)
+        if not self._is_model_fitted(stacklevel=2):
+            return np.zeros(len(freqs), dtype=complex)
+
         n_ports = int(np.sqrt(len(self.constant_coeff)))
-        i_response = i * n_ports + j
-        residues = self.residues[i_response]
-
-        resp = self.proportional_coeff[i_response] * s + self.constant_coeff[i_response]
-        for i, pole in enumerate(self.poles):
-            if np.imag(pole) == 0.0:
-                # real pole
-                resp += residues[i] / (s - pole)
-            else:
-                # complex conjugate pole
-                resp += residues[i] / (s - pole) + np.conjugate(residues[i]) / (s - np.conjugate(pole))
+        return self._get_model_responses([i * n_ports + j], freqs)[0]
+
+    def _is_model_fitted(self, stacklevel: int = 2) -> bool:
+        """
+        Private method.
+        Checks if all parameters of the model have been fitted. Warns about the first missing parameter.
+
+        Parameters
+        ----------
+        stacklevel : int, optional
+            Stack level of the warning, relative to the calling method.
+
+        Returns
+        -------
+        bool
+            True if the poles, residues, proportional coefficients and constants have all been fitted.
+        """
+
+        parameters = (
+            (self.poles, "Poles"),
+            (self.residues, "Residues"),
+            (self.proportional_coeff, "Proportional coefficients"),
+            (self.constant_coeff, "Constants"),
+        )
+        for value, name in parameters:
+            if value is None:
+                warnings.warn(
+                    "Returning a zero-vector; {} have not been fitted.".format(name),
+                    RuntimeWarning,
+                    stacklevel=stacklevel + 1,
+                )
+                return False
+        return True
+
+    def _get_model_responses(self, i_responses: Any, freqs: Any) -> np.ndarray:
+        r"""
+        Private method.
+        Returns several frequency responses of the fitted model at once. The responses are selected by their flat
+        indices :math:`i \cdot N_\mathrm{ports} + j` in the response matrix.
+
+        Parameters
+        ----------
+        i_responses : list of int or ndarray
+            Flat indices of the responses.
+
+        freqs : list of float or ndarray
+            Frequencies (in Hz) at which to calculate the responses.
+
+        Returns
+        -------
+        ndarray
+            Complex-valued model responses with shape (len(i_responses), len(freqs)).
+        """
+
+        freqs = np.array(freqs)
+        if not self._is_model_fitted(stacklevel=3):
+            return np.zeros((len(i_responses), len(freqs)), dtype=complex)
+
+        s = 2j * np.pi * freqs
+
+        # residues of all poles including the complex conjugates, in the order of all_poles
+        residues = self._all_residues[i_responses]
+
+        # the denominators 1 / (s - pole) are shared by all responses
+        denom = s[None, :] - self.all_poles[:, None]
+        np.reciprocal(denom, out=denom)
+
+        resp = np.asarray(self.proportional_coeff)[i_responses, None] * s + \
+            np.asarray(self.constant_coeff)[i_responses, None]
+        resp += np.dot(residues, denom)
         return resp
 
     @check_plotting
@@ -2918,6 +2523,8 @@ class VectorFitting:
         freqs: Any = None,
         parameter: str = "s",
         ax: mplt.Axes = None,
+        max_points: int = None,
+        rasterized: bool = None,
     ) -> mplt.Axes:
         """
         Plots the specified component of the parameter :math:`H_{i+1,j+1}` in the fit, where :math:`H` is
@@ -2954,6 +2561,17 @@ class VectorFitting:
         ax : :class:`matplotlib.Axes` object or None
             matplotlib axes to draw on. If None, the current axes is fetched with :func:`gca()`.
 
+        max_points : int or None, optional
+            Maximum number of frequencies at which the fitted model response is evaluated and drawn. Denser frequency
+            lists are subsampled evenly (including both ends) to save computation and drawing time, as long as
+            `max_points` is larger than the width of the plot in pixels. The samples of :attr:`network` are always
+            plotted at all frequencies. If None (default), the model response is plotted at all frequencies.
+
+        rasterized : bool or None, optional
+            Draw the samples and the fitted responses as raster graphics in vector outputs (e.g. pdf or svg), which
+            keeps very dense plots fast to render and small in file size. If None (default), only the samples get
+            rasterized, and only if there are more than 50 000 of them.
+
         Returns
         -------
         :class:`matplotlib.Axes`
@@ -2967,8 +2585,11 @@ class VectorFitting:
             Also if `component` and/or `parameter` are not valid.
         """
 
-        components = ["db", "mag", "deg", "deg_unwrap", "re", "im"]
-        if component.lower() in components:
+        # the transformation of the responses into the component is resolved once for all plots
+        component_entry = _COMPONENT_TABLE.get(component.lower())
+        if component_entry is not None:
+            transform, y_label = component_entry
+
             if ax is None:
                 ax = mplt.gca()
 
@@ -3005,30 +2626,17 @@ class VectorFitting:
                         "got `{}`.".format(parameter)
                     )
 
-                i_samples = 0
-                for i in list_i:
-                    for j in list_j:
-                        if i_samples == 0:
-                            label = "Samples"
-                        else:
-                            label = "_nolegend_"
-                        i_samples += 1
-
-                        y_vals = None
-                        if component.lower() == "db":
-                            y_vals = 20 * np.log10(np.abs(responses[:, i, j]))
-                        elif component.lower() == "mag":
-                            y_vals = np.abs(responses[:, i, j])
-                        elif component.lower() == "deg":
-                            y_vals = np.rad2deg(np.angle(responses[:, i, j]))
-                        elif component.lower() == "deg_unwrap":
-                            y_vals = np.rad2deg(np.unwrap(np.angle(responses[:, i, j])))
-                        elif component.lower() == "re":
-                            y_vals = np.real(responses[:, i, j])
-                        elif component.lower() == "im":
-                            y_vals = np.imag(responses[:, i, j])
-
-                        ax.scatter(self.network.f, y_vals, color="r", label=label)
+                # all selected responses at once; the columns are ordered as in loops over i and j
+                y_samples = responses[:, list_i][:, :, list_j].reshape((len(self.network.f), -1))
+                y_vals = transform(y_samples)
+
+                # single scatter plot for all responses
+                if rasterized is None:
+                    rasterize_samples = np.size(y_vals) > 50000
+                else:
+                    rasterize_samples = rasterized
+                ax.scatter(np.tile(self.network.f, np.shape(y_vals)[1]), y_vals.T.ravel(), color="r", label="Samples",
+                           rasterized=rasterize_samples)
 
                 if freqs is None:
                     # get frequency array from the network
@@ -3040,51 +2648,32 @@ class VectorFitting:
                     "frequency information."
                 )
 
-            # plot the fitted responses
-            y_label = ""
-            i_fit = 0
-            for i in list_i:
-                for j in list_j:
-                    if i_fit == 0:
-                        label = "Fit"
-                    else:
-                        label = "_nolegend_"
-                    i_fit += 1
-
-                    y_model = self.get_model_response(i, j, freqs)
-                    y_vals = None
-                    if component.lower() == "db":
-                        y_vals = 20 * np.log10(np.abs(y_model))
-                        y_label = "Magnitude (dB)"
-                    elif component.lower() == "mag":
-                        y_vals = np.abs(y_model)
-                        y_label = "Magnitude"
-                    elif component.lower() == "deg":
-                        y_vals = np.rad2deg(np.angle(y_model))
-                        y_label = "Phase (Degrees)"
-                    elif component.lower() == "deg_unwrap":
-                        y_vals = np.rad2deg(np.unwrap(np.angle(y_model)))
-                        y_label = "Phase (Degrees)"
-                    elif component.lower() == "re":
-                        y_vals = np.real(y_model)
-                        y_label = "Real Part"
-                    elif component.lower() == "im":
-                        y_vals = np.imag(y_model)
-                        y_label = "Imaginary Part"
-
-                    ax.plot(freqs, y_vals, color="k", label=label)
+            if max_points is not None and len(freqs) > max_points:
+                # the plots use a linear frequency axis, so the subsampled frequencies are spaced evenly
+                idx_freqs = np.round(np.linspace(0, len(freqs) - 1, max_points)).astype(int)
+                freqs = np.asarray(freqs)[idx_freqs]
+
+            # plot the fitted responses, which are all evaluated in a single call
+            i_responses = [i * n_ports + j for i in list_i for j in list_j]
+            y_model = self._get_model_responses(i_responses, freqs).T
+            y_vals = transform(y_model)
+
+            # all responses are drawn as a single collection of lines with a single legend entry
+            segments = np.stack((np.broadcast_to(np.asarray(freqs, dtype=float), y_vals.T.shape), y_vals.T), axis=-1)
+            ax.add_collection(LineCollection(segments, colors="k", label="Fit", rasterized=bool(rasterized)))
+            ax.autoscale_view()
 
             ax.set_xlabel("Frequency (Hz)")
             ax.set_ylabel(y_label)
             ax.legend(loc="best")
 
-            if i_fit == 1:
-                ax.set_title("Response i={}, j={}".format(i, j))
+            if len(i_responses) == 1:
+                ax.set_title("Response i={}, j={}".format(list_i[0], list_j[0]))
 
             return ax
         else:
             raise ValueError(
-                'The specified component ("{}") is not valid. Must be in {}.'.format(component, components)
+                'The specified component ("{}") is not valid. Must be in {}.'.format(component, list(_COMPONENT_TABLE))
             )
 
     def plot_s_db(self, *args, **kwargs) -> mplt.Axes:
@@ -3278,15 +2867,13 @@ class VectorFitting:
         # get system matrices of state-space representation
         A, B, C, D, E = self._get_ABCDE()
 
-        n_ports = np.shape(D)[0]
-        singvals = np.zeros((n_ports, len(freqs)))
-
-        # calculate and save singular values for each frequency
-        u, sigma, vh = np.linalg.svd(self._get_s_from_ABCDE(freqs, A, B, C, D, E))
+        # calculate singular values for each frequency; the singular vectors are not required
+        sigma = np.linalg.svd(self._get_s_from_ABCDE(freqs, A, B, C, D, E), compute_uv=False)
 
-        # plot the frequency response of each singular value
-        for n in range(n_ports):
-            ax.plot(freqs, sigma[:, n], label=r"$\sigma_{}$".format(n + 1))
+        # plot the frequency response of each singular value with a single call
+        lines = ax.plot(freqs, sigma)
+        for n, line in enumerate(lines):
+            line.set_label(r"$\sigma_{}$".format(n + 1))
         ax.set_xlabel("Frequency (Hz)")
         ax.set_ylabel("Magnitude")
         ax.legend(loc="best")
@@ -3314,19 +2901,15 @@ class VectorFitting:
         if ax is None:
             ax = mplt.gca()
 
-        ax.semilogy(
-            np.arange(len(self.delta_max_history)) + 1,
-            self.delta_max_history,
-            color="darkblue",
-        )
+        # both histories are recorded in each iteration step, so they share the iteration axis
+        steps = np.arange(1, max(len(self.delta_max_history), len(self.d_res_history)) + 1)
+
+        ax.plot(steps[:len(self.delta_max_history)], self.delta_max_history, color="darkblue")
+        ax.set_yscale("log")
         ax.set_xlabel("Iteration step")
         ax.set_ylabel("Max. relative change", color="darkblue")
         ax2 = ax.twinx()
-        ax2.plot(
-            np.arange(len(self.d_res_history)) + 1,
-            self.d_res_history,
-            color="orangered",
-        )
+        ax2.plot(steps[:len(self.d_res_history)], self.d_res_history, color="orangered")
         ax2.set_ylabel("Residue", color="orangered")
         return ax
 
@@ -3401,161 +2984,126 @@ class VectorFitting:
             return subcircuits[-1]
 
         # use engineering notation for the numbers in the SPICE file (1000 --> 1k)
-        formatter = EngFormatter(sep="", places=3, usetex=False)
-        # replace "micron" sign by "u" and "mega" sign by "meg"
-        letters_dict = formatter.ENG_PREFIXES
-        letters_dict.update({-6: "u", 6: "meg"})
-        formatter.ENG_PREFIXES = letters_dict
+        formatter = _format_eng
+
+        # component values of the equivalent admittances of all pole-residue pairs (responses x poles)
+        # residues with negative real parts get multiplied by -1, otherwise the values for RLC would be negative; this
+        # gets compensated by inverting the transfer current direction for the respective subcircuits
+        is_inv = np.real(self.residues) < 0.0
+        residues = np.where(is_inv, -1 * self.residues, self.residues)
+        is_real = np.imag(self.poles) == 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # real poles (rl_admittance): L = 1 / c', R = -p' / c'
+            # complex poles (rcl_vccs_admittance): L = 1 / (2 * c'), R = -p' / c', C = 2 * c' / |p| ** 2
+            # and gm = b * L * C with b = -2 * (c'p' + c"p")
+            ind = np.where(is_real, 1 / np.real(residues), 1 / (2 * np.real(residues)))
+            res = -1 * np.real(self.poles) / np.real(residues)
+            cap = 2 * np.real(residues) / (np.abs(self.poles) ** 2)
+            b = -2 * (np.real(residues) * np.real(self.poles) + np.imag(residues) * np.imag(self.poles))
+            gm_add = b * ind * cap
+
+            # constant and proportional terms: R = 1 / |d| and C = |e|, connected to the inverted node for d, e < 0
+            sign_const = np.sign(self.constant_coeff)
+            res_const = np.abs(1 / np.asarray(self.constant_coeff))
+            sign_prop = np.sign(self.proportional_coeff)
+            cap_prop = np.abs(self.proportional_coeff)
+
+        # the circuit is assembled line by line and written to the file at once
+        lines = []
+
+        # write title line
+        lines.append(
+            "* EQUIVALENT CIRCUIT FOR VECTOR FITTED S-MATRIX\n"
+            "* Created using scikit-rf vectorFitting.py\n"
+            "*\n"
+        )
 
-        with open(file, "w") as f:
-            # write title line
-            f.write("* EQUIVALENT CIRCUIT FOR VECTOR FITTED S-MATRIX\n")
-            f.write("* Created using scikit-rf vectorFitting.py\n")
-            f.write("*\n")
-
-            # define the complete equivalent circuit as a subcircuit with one input node per port
-            # those port nodes are labeled p1, p2, p3, ...
-            # all ports share a common node for ground reference (node 0)
-            str_input_nodes = ""
-            for n in range(self.network.nports):
-                str_input_nodes += "p{} ".format(n + 1)
-
-            f.write(".SUBCKT s_equivalent {}\n".format(str_input_nodes))
-
-            for n in range(self.network.nports):
-                f.write("*\n")
-                f.write("* port {}\n".format(n + 1))
-                # add port reference impedance z0 (has to be resistive, no imaginary part)
-                f.write("R{} a{} 0 {}\n".format(n + 1, n + 1, np.real(self.network.z0[0, n])))
-
-                # add dummy voltage sources (V=0) to measure the input current
-                f.write("V{} p{} a{} 0\n".format(n + 1, n + 1, n + 1))
-
-                # CCVS and VCVS driving the transfer admittances with a = V/2/sqrt(Z0) + I/2*sqrt(Z0)
-                # In
-                f.write("H{} nt{} nts{} V{} {}\n".format(n + 1, n + 1, n + 1, n + 1, np.real(self.network.z0[0, n])))
-                # Vn
-                f.write("E{} nts{} 0 p{} 0 {}\n".format(n + 1, n + 1, n + 1, 1))
-
-                for j in range(self.network.nports):
-                    f.write("* transfer network for s{}{}\n".format(n + 1, j + 1))
-
-                    # stacking order in VectorFitting class variables:
-                    # s11, s12, s13, ..., s21, s22, s23, ...
-                    i_response = n * self.network.nports + j
-
-                    # add CCCS to generate the scattered current I_nj at port n
-                    # control current is measured by the dummy voltage source at the transfer network Y_nj
-                    # the scattered current is injected into the port (source positive connected to ground)
-                    f.write(
-                        "F{}{} 0 a{} V{}{} {}\n".format(
-                            n + 1,
-                            j + 1,
-                            n + 1,
-                            n + 1,
-                            j + 1,
-                            formatter(1 / np.real(self.network.z0[0, n])),
+        # define the complete equivalent circuit as a subcircuit with one input node per port
+        # those port nodes are labeled p1, p2, p3, ...
+        # all ports share a common node for ground reference (node 0)
+        str_input_nodes = "".join(f"p{n + 1} " for n in range(self.network.nports))
+        lines.append(f".SUBCKT s_equivalent {str_input_nodes}\n")
+
+        for n in range(self.network.nports):
+            # add port reference impedance z0 (has to be resistive, no imaginary part)
+            # z0 and its formatted reciprocal are used for all transfer networks of this port
+            z0_n = np.real(self.network.z0[0, n])
+            str_inv_z0_n = formatter(1 / z0_n)
+
+            # port n with its reference impedance R_n, a dummy voltage source V_n (V=0) to measure the input current,
+            # and the CCVS H_n (In) and VCVS E_n (Vn) driving the transfer admittances with
+            # a = V/2/sqrt(Z0) + I/2*sqrt(Z0)
+            lines.append(
+                f"*\n"
+                f"* port {n + 1}\n"
+                f"R{n + 1} a{n + 1} 0 {z0_n}\n"
+                f"V{n + 1} p{n + 1} a{n + 1} 0\n"
+                f"H{n + 1} nt{n + 1} nts{n + 1} V{n + 1} {z0_n}\n"
+                f"E{n + 1} nts{n + 1} 0 p{n + 1} 0 1\n"
+            )
+
+            for j in range(self.network.nports):
+                # stacking order in VectorFitting class variables:
+                # s11, s12, s13, ..., s21, s22, s23, ...
+                i_response = n * self.network.nports + j
+                nj = f"{n + 1}{j + 1}"
+
+                # add CCCS to generate the scattered current I_nj at port n
+                # control current is measured by the dummy voltage source (V=0) in series with the transfer admittance
+                # Y_nj; the scattered current is injected into the port (source positive connected to ground)
+                # the transfer admittance is a parallel circuit (sum) of individual admittances, which get connected to
+                # the nodes nt_nj or nt_nj_inv (inverted transfer current direction)
+                lines.append(
+                    f"* transfer network for s{nj}\n"
+                    f"F{nj} 0 a{n + 1} V{nj} {str_inv_z0_n}\n"
+                    f"F{nj}_inv a{n + 1} 0 V{nj}_inv {str_inv_z0_n}\n"
+                    f"V{nj} nt{j + 1} nt{nj} 0\n"
+                    f"V{nj}_inv nt{j + 1} nt{nj}_inv 0\n"
+                    f"* transfer admittances for S{nj}\n"
+                )
+
+                # start with proportional and constant term of the model
+                # H(s) = d + s * e  model
+                # Y(s) = G + s * C  equivalent admittance
+
+                # add R for constant term
+                if sign_const[i_response] < 0:
+                    lines.append(f"R{nj} nt{nj}_inv 0 {formatter(res_const[i_response])}\n")
+                elif sign_const[i_response] > 0:
+                    lines.append(f"R{nj} nt{nj} 0 {formatter(res_const[i_response])}\n")
+
+                # add C for proportional term
+                if sign_prop[i_response] < 0:
+                    lines.append(f"C{nj} nt{nj}_inv 0 {formatter(cap_prop[i_response])}\n")
+                elif sign_prop[i_response] > 0:
+                    lines.append(f"C{nj} nt{nj} 0 {formatter(cap_prop[i_response])}\n")
+
+                # add pairs of poles and residues
+                for i_pole in range(len(self.poles)):
+                    node = f"{get_new_subckt_identifier()} nt{nj}"
+                    if is_inv[i_response, i_pole]:
+                        node += "_inv"
+
+                    if is_real[i_pole]:
+                        # real pole; add rl_admittance
+                        lines.append(
+                            f"{node} 0 rl_admittance res={formatter(res[i_response, i_pole])} "
+                            f"ind={formatter(ind[i_response, i_pole])}\n"
                         )
-                    )
-                    f.write(
-                        "F{}{}_inv a{} 0 V{}{}_inv {}\n".format(
-                            n + 1,
-                            j + 1,
-                            n + 1,
-                            n + 1,
-                            j + 1,
-                            formatter(1 / np.real(self.network.z0[0, n])),
+                    else:
+                        # complex pole of a conjugate pair; add rcl_vccs_admittance
+                        if gm_add[i_response, i_pole] < 0:
+                            m = -1
+                        else:
+                            m = 1
+                        lines.append(
+                            f"{node} 0 rcl_vccs_admittance res={formatter(res[i_response, i_pole])} "
+                            f"cap={formatter(cap[i_response, i_pole])} ind={formatter(ind[i_response, i_pole])} "
+                            f"gm={formatter(np.abs(gm_add[i_response, i_pole]))} mult={m}\n"
                         )
-                    )
 
-                    # add dummy voltage source (V=0) in series with Y_nj to measure current through transfer admittance
-                    f.write("V{}{} nt{} nt{}{} 0\n".format(n + 1, j + 1, j + 1, n + 1, j + 1))
-                    f.write("V{}{}_inv nt{} nt{}{}_inv 0\n".format(n + 1, j + 1, j + 1, n + 1, j + 1))
-
-                    # add corresponding transfer admittance Y_nj, which is modulating the control current
-                    # the transfer admittance is a parallel circuit (sum) of individual admittances
-                    f.write("* transfer admittances for S{}{}\n".format(n + 1, j + 1))
-
-                    # start with proportional and constant term of the model
-                    # H(s) = d + s * e  model
-                    # Y(s) = G + s * C  equivalent admittance
-                    g = self.constant_coeff[i_response]
-                    c = self.proportional_coeff[i_response]
-
-                    # add R for constant term
-                    if g < 0:
-                        f.write("R{}{} nt{}{}_inv 0 {}\n".format(n + 1, j + 1, n + 1, j + 1, formatter(np.abs(1 / g))))
-                    elif g > 0:
-                        f.write("R{}{} nt{}{} 0 {}\n".format(n + 1, j + 1, n + 1, j + 1, formatter(1 / g)))
-
-                    # add C for proportional term
-                    if c < 0:
-                        f.write("C{}{} nt{}{}_inv 0 {}\n".format(n + 1, j + 1, n + 1, j + 1, formatter(np.abs(c))))
-                    elif c > 0:
-                        f.write("C{}{} nt{}{} 0 {}\n".format(n + 1, j + 1, n + 1, j + 1, formatter(c)))
-
-                    # add pairs of poles and residues
-                    for i_pole in range(len(self.poles)):
-                        pole = self.poles[i_pole]
-                        residue = self.residues[i_response, i_pole]
-                        node = get_new_subckt_identifier() + " nt{}{}".format(n + 1, j + 1)
-
-                        if np.real(residue) < 0.0:
-                            # multiplication with -1 required, otherwise the values for RLC would be negative
-                            # this gets compensated by inverting the transfer current direction for this subcircuit
-                            residue = -1 * residue
-                            node += "_inv"
-
-                        if np.imag(pole) == 0.0:
-                            # real pole; add rl_admittance
-                            l = 1 / np.real(residue)
-                            r = -1 * np.real(pole) / np.real(residue)
-                            f.write(node + " 0 rl_admittance res={} ind={}\n".format(formatter(r), formatter(l)))
-                        else:
-                            # complex pole of a conjugate pair; add rcl_vccs_admittance
-                            l = 1 / (2 * np.real(residue))
-                            b = -2 * (np.real(residue) * np.real(pole) + np.imag(residue) * np.imag(pole))
-                            r = -1 * np.real(pole) / np.real(residue)
-                            c = 2 * np.real(residue) / (np.abs(pole) ** 2)
-                            gm_add = b * l * c
-                            if gm_add < 0:
-                                m = -1
-                            else:
-                                m = 1
-                            f.write(
-                                node
-                                + " 0 rcl_vccs_admittance res={} cap={} ind={} gm={} mult={}\n".format(
-                                    formatter(r),
-                                    formatter(c),
-                                    formatter(l),
-                                    formatter(np.abs(gm_add)),
-                                    int(m),
-                                )
-                            )
-
-            f.write(".ENDS s_equivalent\n")
-
-            f.write("*\n")
-
-            # subcircuit for an active RCL+VCCS equivalent admittance Y(s) of a complex-conjugate pole-residue pair H(s)
-            # Residue: c = c' + j * c"
-            # Pole: p = p' + j * p"
-            # H(s)  = c / (s - p) + conj(c) / (s - conj(p))
-            #       = (2 * c' * s - 2 * (c'p' + c"p")) / (s ** 2 - 2 * p' * s + |p| ** 2)
-            # Y(S)  = (1 / L * s + b) / (s ** 2 + R / L * s + 1 / (L * C))
-            f.write(".SUBCKT rcl_vccs_admittance n_pos n_neg res=1k cap=1n ind=100p gm=1m mult=1\n")
-            f.write("L1 n_pos 1 {ind}\n")
-            f.write("C1 1 2 {cap}\n")
-            f.write("R1 2 n_neg {res}\n")
-            f.write("G1 n_pos n_neg 1 2 {gm} m={mult}\n")
-            f.write(".ENDS rcl_vccs_admittance\n")
-
-            f.write("*\n")
-
-            # subcircuit for a passive RL equivalent admittance Y(s) of a real pole-residue pair H(s)
-            # H(s) = c / (s - p)
-            # Y(s) = 1 / L / (s + s * R / L)
-            f.write(".SUBCKT rl_admittance n_pos n_neg res=1k ind=100p\n")
-            f.write("L1 n_pos 1 {ind}\n")
-            f.write("R1 1 n_neg {res}\n")
-            f.write(".ENDS rl_admittance\n")
+        lines.append(".ENDS s_equivalent\n")
+        lines.append(_SPICE_ADMITTANCE_SUBCIRCUITS)
+
+        with open(file, "w") as f:
+            f.write("".join(lines))